@@ -1,21 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from schemas.auth import LoginRequest
-from db.crud import get_user_by_username
-from core.security import verify_password
-from dependencies.db import get_db
+from db.crud import aget_user_by_username
+from core.security import verify_and_update_async, PasswordPoolBusyError
+from core.tokens import issue_token
+from core.config import AUTH_TOKEN_TTL_SECONDS
+from dependencies.db import get_async_db
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
 @router.post("/login/")
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    print(data)
-    user = get_user_by_username(db, data.username)
-    print(user)
-    if not user or not verify_password(data.password, user.password_hash):
+async def login(data: LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    # Async session and process-pool bcrypt: a login burst never blocks the event loop
+    user = await aget_user_by_username(db, data.username)
+    if not user:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
+    try:
+        valid, new_hash = await verify_and_update_async(data.password, user.password_hash)
+    except PasswordPoolBusyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+
+    # Stored with an outdated bcrypt cost: replace it while the password is at hand
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+
+    # The signed token carries the role, so chat and ingest calls skip the DB and bcrypt
     return {
         "username": user.username,
-        "role": user.role.name
+        "role": user.role.name,
+        "access_token": issue_token(user.username, user.role.name),
+        "token_type": "bearer",
+        "expires_in": AUTH_TOKEN_TTL_SECONDS
     }
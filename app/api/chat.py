@@ -1,16 +1,24 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi.responses import StreamingResponse
 from schemas.chat import ChatRequest
-from services.rag.agent import query
+from services.rag.agent import query, stream_query, query_embedding_cache, answer_cache
+from utils.helpers import format_sse
+from dependencies.auth import get_current_user
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 
+def token_role(data: ChatRequest, user: dict):
+    """The role to answer as comes from the verified token, never from the body"""
+    if data.user_role and data.user_role.lower() != user["role"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role mismatch")
+    return user["role"]
+
 @router.post("/")
-def chat(data: ChatRequest):
-    if data:
-        message = data.user_query
-        user_role = data.user_role.lower()
+async def chat(data: ChatRequest, user: dict = Depends(get_current_user)):
+    message = data.user_query
+    user_role = token_role(data, user)
 
-    tool_used,tool_name,final_answer,sources = query(message, user_role)
+    tool_used,tool_name,final_answer,sources = await query(message, user_role)
 
     print("sources:", sources)
 
@@ -22,3 +30,31 @@ def chat(data: ChatRequest):
     }
 
     return response
+
+
+@router.post("/stream/")
+async def chat_stream(data: ChatRequest, user: dict = Depends(get_current_user)):
+    message = data.user_query
+    user_role = token_role(data, user)
+
+    async def event_stream():
+        try:
+            async for event, payload in stream_query(message, user_role):
+                yield format_sse(event, payload)
+        except Exception as e:
+            print(f"❌ Chat stream error: {e}")
+            yield format_sse("error", {"message": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stats/")
+async def chat_stats():
+    return {
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "answer_cache": answer_cache.stats()
+    }
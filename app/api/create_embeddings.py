@@ -1,10 +1,41 @@
-from fastapi import APIRouter,UploadFile, File,HTTPException
-from services.rag.embeddings import create_embeddings
+from fastapi import APIRouter,UploadFile, File,HTTPException, Depends
+from fastapi import status
+from services.rag.embeddings import create_embeddings, create_embeddings_bulk
+from services.rag.jobs import IngestJobQueue, QueueFullError
+from dependencies.auth import require_ingest_admin
+from core.config import (
+    INGEST_JOBS_DIR, INGEST_MAX_WORKERS,
+    INGEST_MAX_PENDING_JOBS, INGEST_JOB_RETENTION_SECONDS, BULK_INGEST_MAX_BYTES
+)
 
+# Bulk uploads are read in pieces so an oversized request is rejected early
+UPLOAD_READ_CHUNK_BYTES = 1024 * 1024
 
-router  = APIRouter(prefix="/embeddings",tags=["Embeddings"])
 
-@router.post("/ingest/")
+# Only admin roles (INGEST_ADMIN_ROLES) may upload or poll jobs
+router  = APIRouter(prefix="/embeddings",tags=["Embeddings"], dependencies=[Depends(require_ingest_admin)])
+
+# Uploads are parsed, embedded and saved by background workers
+ingest_queue = IngestJobQueue(
+    INGEST_JOBS_DIR,
+    max_workers=INGEST_MAX_WORKERS,
+    max_pending=INGEST_MAX_PENDING_JOBS,
+    retention_seconds=INGEST_JOB_RETENTION_SECONDS
+)
+
+async def read_upload_capped(file: UploadFile, max_bytes: int):
+    """Read an upload, failing with 413 as soon as it exceeds max_bytes"""
+    data = bytearray()
+    while chunk := await file.read(UPLOAD_READ_CHUNK_BYTES):
+        data.extend(chunk)
+        if len(data) > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds {BULK_INGEST_MAX_BYTES} bytes"
+            )
+    return bytes(data)
+
+@router.post("/ingest/", status_code=status.HTTP_202_ACCEPTED)
 async def ingest_documents(
     role : str,
     file: UploadFile = File(...)
@@ -15,10 +46,54 @@ async def ingest_documents(
 
     # Read file bytes
     file_bytes = await file.read()
+    if not file_bytes:
+        raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
-    result  = create_embeddings(role,file_bytes,filename=file.filename)
+    try:
+        job = ingest_queue.submit(role, file.filename, create_embeddings, role, file_bytes, filename=file.filename)
+    except QueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
 
     return {
+        "job_id": job.id,
         "filename": file.filename,
-        "message": result
+        "status": job.status
+    }
+
+@router.post("/ingest/bulk/", status_code=status.HTTP_202_ACCEPTED)
+async def ingest_documents_bulk(
+    role : str,
+    files: list[UploadFile] = File(...)
+):
+    # Validate file types: PDFs or zip archives of PDFs
+    for file in files:
+        name = (file.filename or "").lower()
+        if not (name.endswith(".pdf") or name.endswith(".zip")):
+            raise HTTPException(status_code=400, detail=f"Only PDF or zip files are allowed: {file.filename}")
+
+    # The cap bounds what is held in memory: each file may only use what the
+    # previous ones left (zips are checked again on their unzipped size)
+    uploads = []
+    remaining = BULK_INGEST_MAX_BYTES
+    for file in files:
+        data = await read_upload_capped(file, remaining)
+        remaining -= len(data)
+        uploads.append((file.filename, data))
+
+    try:
+        job = ingest_queue.submit(role, f"{len(uploads)} files", create_embeddings_bulk, role, uploads)
+    except QueueFullError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    return {
+        "job_id": job.id,
+        "files": [filename for filename, _ in uploads],
+        "status": job.status
     }
+
+@router.get("/jobs/{job_id}")
+def get_ingest_job(job_id: str):
+    job = ingest_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
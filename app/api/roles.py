@@ -1,16 +1,44 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from db.crud import create_role, get_roles
-from schemas.role import RoleCreate, RoleResponse
+from db.crud import create_role, get_roles_page, get_role_by_name, grant_role_categories
+from schemas.role import RoleCreate, RoleResponse, RoleCategoriesGrant, RoleCategoriesResponse
 from dependencies.db import get_db
+from dependencies.auth import require_user_admin
+from utils.helpers import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
 from fastapi import status
 
 router = APIRouter(prefix="/roles", tags=["Roles"])
 
-@router.post("/", response_model=RoleResponse,status_code=status.HTTP_201_CREATED)
+# Only admin roles (USER_ADMIN_ROLES) may create roles; listing stays open for the login page
+@router.post("/", response_model=RoleResponse,status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_user_admin)])
 def add_role(role: RoleCreate, db: Session = Depends(get_db)):
-    return create_role(db, role.name, role.description)
+    return create_role(db, role.name, role.description, role.categories)
+
+@router.post("/{role_name}/categories", response_model=RoleCategoriesResponse, dependencies=[Depends(require_user_admin)])
+def grant_categories(role_name: str, grant: RoleCategoriesGrant, db: Session = Depends(get_db)):
+    # Takes effect in this worker now and in the others at their next ACL refresh
+    role = get_role_by_name(db, role_name)
+    if not role:
+        raise HTTPException(status_code=404, detail="Role not found")
+    return {"role": role.name, "categories": grant_role_categories(db, role, grant.categories)}
 
 @router.get("/", response_model=list[RoleResponse])
-def list_roles(db: Session = Depends(get_db)):
-    return get_roles(db)
+def list_roles(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit, with no cursor, for the whole list"),
+    cursor: str | None = None,
+    db: Session = Depends(get_db)
+):
+    # Keyset pagination when limit or cursor is given: pass X-Next-Cursor back
+    # as ?cursor= for the next page. Without either, the whole list as before
+    if cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        after = decode_cursor(cursor, int) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    roles, last = get_roles_page(db, limit, after_id=after)
+    if last is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(last)
+    return roles
@@ -1,26 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from db.crud import create_user, get_users,get_role_by_name,get_user_by_username
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.crud import get_users_page, acreate_user, aget_role_by_name, aget_user_by_username
 from schemas.user import UserCreate, UserResponse
-from dependencies.db import get_db
+from dependencies.db import get_db, get_async_db
+from dependencies.auth import require_user_admin
+from core.security import hash_password_async, PasswordPoolBusyError
+from utils.helpers import encode_cursor, decode_cursor, DEFAULT_PAGE_SIZE
 from fastapi import status
 
-router = APIRouter(prefix="/users", tags=["Users"])
+# Only admin roles (USER_ADMIN_ROLES) may create or list users: a self-made
+# admin account would otherwise get a token that passes every role check
+router = APIRouter(prefix="/users", tags=["Users"], dependencies=[Depends(require_user_admin)])
 
 @router.post("/", response_model=UserResponse,status_code=status.HTTP_201_CREATED)
-def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = get_user_by_username(db, user.username)
+async def create_new_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Async session and process-pool bcrypt, so nothing here blocks the event loop
+    existing_user = await aget_user_by_username(db, user.username)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Username already exists"
         )
     
-    role = get_role_by_name(db, user.role_name)
+    role = await aget_role_by_name(db, user.role_name)
     if not role:
         raise HTTPException(status_code=404, detail="Role not found")
 
-    new_user = create_user(db, user.username, user.password, role)
+    try:
+        password_hash = await hash_password_async(user.password)
+    except PasswordPoolBusyError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+
+    new_user = await acreate_user(db, user.username, password_hash, role)
 
     return {
         "id": new_user.id,
@@ -29,8 +41,25 @@ def create_new_user(user: UserCreate, db: Session = Depends(get_db)):
     }
 
 @router.get("/", response_model=list[UserResponse])
-def get_all_users(db: Session = Depends(get_db)):
-    users = get_users(db)
+def get_all_users(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=1000, description="Page size; omit, with no cursor, for the whole list"),
+    cursor: str | None = None,
+    prefix: str | None = Query(None, description="Only usernames starting with this"),
+    db: Session = Depends(get_db)
+):
+    # Keyset pagination when limit or cursor is given: pass X-Next-Cursor back
+    # as ?cursor= for the next page. Without either, the whole list as before
+    if cursor and limit is None:
+        limit = DEFAULT_PAGE_SIZE
+    try:
+        after = decode_cursor(cursor, str) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    users, last = get_users_page(db, limit, after_username=after, prefix=prefix)
+    if last is not None:
+        response.headers["X-Next-Cursor"] = encode_cursor(last)
     return [
         UserResponse(
             id=u.id,
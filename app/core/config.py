@@ -0,0 +1,207 @@
+import json
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+
+# -------------------------------
+# Index location
+# -------------------------------
+# Root of the partitioned FAISS store (one folder per category); benchmarks
+# point it at a scratch directory
+FAISS_INDEX_DIR = Path(os.getenv("FAISS_INDEX_DIR", str(BASE_DIR / "faiss_index")))
+
+# -------------------------------
+# Query embedding cache
+# -------------------------------
+# Number of query vectors kept in memory (0 disables the cache)
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+
+# Optional SQLite file that keeps query vectors across restarts
+QUERY_EMBEDDING_CACHE_PATH = os.getenv("QUERY_EMBEDDING_CACHE_PATH") or None
+
+# -------------------------------
+# Chunk embedding cache
+# -------------------------------
+# SQLite file mapping chunk content hashes to vectors, so re-ingesting a
+# document only embeds new or changed chunks
+CHUNK_EMBEDDING_CACHE_PATH = os.getenv(
+    "CHUNK_EMBEDDING_CACHE_PATH", str(FAISS_INDEX_DIR / "chunk_embeddings.sqlite")
+)
+
+# -------------------------------
+# Semantic answer cache
+# -------------------------------
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Cosine similarity a new query needs with a cached one to reuse its answer
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+
+# Answers kept per role; the oldest are evicted first
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "500"))
+
+# -------------------------------
+# Background ingestion jobs
+# -------------------------------
+# Worker threads processing uploads concurrently
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "2"))
+
+# Queued + running jobs accepted before uploads are rejected with 503
+INGEST_MAX_PENDING_JOBS = int(os.getenv("INGEST_MAX_PENDING_JOBS", "20"))
+
+# How long finished job status stays available
+INGEST_JOB_RETENTION_SECONDS = int(os.getenv("INGEST_JOB_RETENTION_SECONDS", "3600"))
+
+INGEST_JOBS_DIR = os.getenv("INGEST_JOBS_DIR", str(FAISS_INDEX_DIR / "_jobs"))
+
+# -------------------------------
+# Embedding pipeline (ingestion)
+# -------------------------------
+# Chunks per embed_documents request
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+
+# Batches in flight at the same time
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+
+# Provider request limit enforced by a token bucket (0 disables it)
+EMBED_REQUESTS_PER_MINUTE = int(os.getenv("EMBED_REQUESTS_PER_MINUTE", "150"))
+
+# Retries per batch on throttling/transient errors, with exponential backoff
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+
+# -------------------------------
+# Ingestion parsing
+# -------------------------------
+# Processes parsing PDFs during ingestion (defaults to all cores)
+INGEST_PARSE_PROCESSES = int(os.getenv("INGEST_PARSE_PROCESSES", "0")) or os.cpu_count()
+
+# Upper bound on PDF bytes accepted by one bulk upload (after unzipping)
+BULK_INGEST_MAX_BYTES = int(os.getenv("BULK_INGEST_MAX_BYTES", str(500 * 1024 * 1024)))
+
+# -------------------------------
+# Corpus sync
+# -------------------------------
+# Folder with one sub-folder of markdown/CSV files per department
+CORPUS_DATA_DIR = os.getenv("CORPUS_DATA_DIR", str(BASE_DIR / "resources" / "data"))
+
+# -------------------------------
+# Index segments
+# -------------------------------
+# Delta segments a partition may accumulate before a background merge folds them into its base
+SEGMENT_MERGE_MAX_DELTAS = int(os.getenv("SEGMENT_MERGE_MAX_DELTAS", "8"))
+
+# Memory-map index segments read-only so uvicorn workers share page-cache pages
+INDEX_MMAP = os.getenv("INDEX_MMAP", "true").lower() in ("1", "true", "yes")
+
+# How often each worker checks for newly published partition versions (0 disables the watcher)
+INDEX_WATCH_INTERVAL_SECONDS = float(os.getenv("INDEX_WATCH_INTERVAL_SECONDS", "1.0"))
+
+# -------------------------------
+# ANN index type
+# -------------------------------
+# flat (exact), ivf_flat, hnsw or ivf_pq; segments below INDEX_ANN_MIN_CHUNKS stay flat
+INDEX_TYPE = os.getenv("INDEX_TYPE", "flat").lower()
+INDEX_ANN_MIN_CHUNKS = int(os.getenv("INDEX_ANN_MIN_CHUNKS", "5000"))
+
+# Build-time parameters, applied when a segment is trained at ingest or merge
+INDEX_IVF_NLIST = int(os.getenv("INDEX_IVF_NLIST", "1024"))
+INDEX_PQ_M = int(os.getenv("INDEX_PQ_M", "64"))
+INDEX_PQ_NBITS = int(os.getenv("INDEX_PQ_NBITS", "8"))
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", "32"))
+INDEX_HNSW_EF_CONSTRUCTION = int(os.getenv("INDEX_HNSW_EF_CONSTRUCTION", "200"))
+
+# Search-time parameters, applied whenever a segment is loaded
+INDEX_IVF_NPROBE = int(os.getenv("INDEX_IVF_NPROBE", "16"))
+INDEX_HNSW_EF_SEARCH = int(os.getenv("INDEX_HNSW_EF_SEARCH", "64"))
+
+# -------------------------------
+# Retrieval
+# -------------------------------
+# vector (embeddings only), hybrid (BM25 + vector, fused by reciprocal rank)
+# or lexical (BM25 only: no embedding API call per question)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid").lower()
+
+# Candidates each retriever contributes to fusion, as a multiple of k
+HYBRID_CANDIDATE_MULTIPLIER = int(os.getenv("HYBRID_CANDIDATE_MULTIPLIER", "2"))
+
+# -------------------------------
+# Diversity re-ranking (MMR)
+# -------------------------------
+MMR_ENABLED = os.getenv("MMR_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Relevance vs diversity weight (1 = relevance only) and candidates re-ranked per query
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.6"))
+MMR_FETCH_K = int(os.getenv("MMR_FETCH_K", "20"))
+
+# Per-role overrides, e.g. '{"c-levelexecutives": {"lambda": 0.5, "fetch_k": 30}}'
+MMR_ROLE_SETTINGS = json.loads(os.getenv("MMR_ROLE_SETTINGS", "{}"))
+
+# -------------------------------
+# Role ACL
+# -------------------------------
+# Seconds between reloads of the role → category table in each worker, so a
+# change made through another worker is picked up (0 disables the reload)
+ROLE_ACL_REFRESH_SECONDS = float(os.getenv("ROLE_ACL_REFRESH_SECONDS", "30"))
+
+# -------------------------------
+# Database
+# -------------------------------
+# Connections kept open per worker, and extra ones opened under bursts
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# Seconds a request waits for a pooled connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+# SQLite: WAL lets readers run alongside the single writer; writers wait up
+# to the busy timeout for the lock instead of failing with "database is locked"
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").upper()
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# -------------------------------
+# Password hashing
+# -------------------------------
+# bcrypt cost; stored hashes with fewer rounds are rehashed at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Processes hashing/verifying passwords (defaults to half the cores, so a
+# login burst can't take every core from chat)
+PASSWORD_HASH_PROCESSES = int(os.getenv("PASSWORD_HASH_PROCESSES", "0")) or max(1, (os.cpu_count() or 2) // 2)
+
+# Password operations queued or running per worker before logins get 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64"))
+
+# -------------------------------
+# Session tokens
+# -------------------------------
+# HMAC key for login tokens, shared by every worker and replica. Required
+# when WEB_CONCURRENCY > 1; if unset, a single worker signs with a random key
+# and all tokens stop working when it restarts
+AUTH_TOKEN_SECRET = os.getenv("AUTH_TOKEN_SECRET") or None
+
+# Worker count uvicorn/gunicorn read from the environment
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+
+# Lifetime of a login token; the user logs in again after it expires
+AUTH_TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", "3600"))
+
+# Roles allowed to ingest documents (for any role) and poll ingest jobs
+INGEST_ADMIN_ROLES = [
+    role.strip().lower() for role in os.getenv("INGEST_ADMIN_ROLES", "c-levelexecutives").split(",") if role.strip()
+]
+
+# Roles allowed to create users and roles (and list users)
+USER_ADMIN_ROLES = [
+    role.strip().lower() for role in os.getenv("USER_ADMIN_ROLES", "c-levelexecutives").split(",") if role.strip()
+]
+
+# First admin account, created by db/init_db.py (with the first USER_ADMIN_ROLES
+# role) when no user has this name yet, since creating users needs an admin token
+BOOTSTRAP_ADMIN_USERNAME = os.getenv("BOOTSTRAP_ADMIN_USERNAME") or None
+BOOTSTRAP_ADMIN_PASSWORD = os.getenv("BOOTSTRAP_ADMIN_PASSWORD") or None
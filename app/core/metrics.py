@@ -0,0 +1,213 @@
+"""
+metrics.py
+----------
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Counters, gauges and histograms are process-wide and thread-safe; every
+uvicorn worker keeps its own registry, so scrape each worker (or sum them
+in Prometheus). Exposed at GET /metrics.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; covers cache hits (~ms) up to slow LLM calls
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key):
+        return list(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [per-bucket counts..., sum, count]
+                state = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(state)) for key, state in self._values.items()]
+        for key, state in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + [("le", _format_value(bound))], cumulative
+            yield f"{self.name}_bucket", labels + [("le", "+Inf")], state[-1]
+            yield f"{self.name}_sum", labels, state[-2]
+            yield f"{self.name}_count", labels, state[-1]
+
+
+def render():
+    return REGISTRY.render()
+
+
+# -------------------------------
+# Application metrics
+# -------------------------------
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code",
+    ("method", "route", "status")
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Time until the response headers are sent",
+    ("method", "route")
+)
+HTTP_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests currently being handled")
+
+# Chat: answer_cache_lookup, agent, llm_first_call, llm_final_call, tool_call,
+# query_embedding, vector_search, lexical_search, mmr, index_load
+RAG_STAGE_SECONDS = Histogram("rag_stage_seconds", "Duration of each chat/retrieval stage", ("stage",))
+RAG_STAGE_ERRORS = Counter("rag_stage_errors_total", "Failed chat/retrieval stages", ("stage",))
+ANSWER_CACHE_LOOKUPS = Counter("rag_answer_cache_lookups_total", "Semantic answer cache lookups", ("result",))
+
+# Ingestion: parse, embed, save
+INGEST_STAGE_SECONDS = Histogram(
+    "ingest_stage_seconds", "Duration of each ingestion stage", ("stage",),
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+)
+INGEST_CHUNKS = Counter("ingest_chunks_total", "Chunks ingested, by how their vector was obtained", ("source",))
+INGEST_FAILURES = Counter("ingest_failures_total", "Failed ingestion runs", ("kind",))
+
+# Password hashing pool: hash, verify
+PASSWORD_POOL_PENDING = Gauge("password_pool_pending", "Password operations queued or running in the process pool")
+PASSWORD_POOL_REJECTED = Counter("password_pool_rejected_total", "Password operations rejected because the pool queue was full")
+PASSWORD_OP_SECONDS = Histogram(
+    "password_op_seconds", "Time from submitting a password operation to its result, queueing included", ("op",)
+)
+
+
+@contextmanager
+def rag_stage(stage):
+    """Time a chat/retrieval stage and count it as failed if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        RAG_STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        RAG_STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
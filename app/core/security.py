@@ -1,9 +1,86 @@
+"""
+security.py
+-----------
+Password hashing with passlib bcrypt.
+
+bcrypt is deliberately slow, so request handlers use the async variants,
+which run on a bounded process pool instead of the request threadpool: a
+login burst is spread across cores and can't starve chat requests. The sync
+functions remain for scripts and seeding.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from core.config import BCRYPT_ROUNDS, PASSWORD_HASH_PROCESSES, PASSWORD_HASH_MAX_PENDING
+from core.metrics import PASSWORD_POOL_PENDING, PASSWORD_POOL_REJECTED, PASSWORD_OP_SECONDS
+
+# min_rounds makes hashes with an outdated cost "need update" on verify
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+
+
+class PasswordPoolBusyError(RuntimeError):
+    pass
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
 def verify_password(password: str, hashed: str) -> bool:
     return pwd_context.verify(password, hashed)
+
+def verify_and_update(password: str, hashed: str):
+    """Return (valid, new_hash); new_hash is set when the stored hash should be replaced"""
+    return pwd_context.verify_and_update(password, hashed)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def get_password_pool():
+    """Process pool for password operations, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a process that runs threads is unsafe
+                _pool = ProcessPoolExecutor(
+                    max_workers=PASSWORD_HASH_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
+
+
+async def _run_in_pool(op, fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= PASSWORD_HASH_MAX_PENDING:
+            PASSWORD_POOL_REJECTED.inc()
+            raise PasswordPoolBusyError("Too many password operations in progress")
+        _pending += 1
+    PASSWORD_POOL_PENDING.inc()
+
+    try:
+        with PASSWORD_OP_SECONDS.time(op=op):
+            return await asyncio.get_running_loop().run_in_executor(get_password_pool(), fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+        PASSWORD_POOL_PENDING.dec()
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_pool("hash", hash_password, password)
+
+async def verify_and_update_async(password: str, hashed: str):
+    return await _run_in_pool("verify", verify_and_update, password, hashed)
@@ -0,0 +1,76 @@
+"""
+tokens.py
+---------
+Stateless, HMAC-signed session tokens.
+
+A token is base64url(JSON claims) + "." + base64url(HMAC-SHA256 signature).
+Claims carry the username, role and expiry, so verifying a request is one
+HMAC over a few hundred bytes: no database lookup and no bcrypt.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+
+from core.config import AUTH_TOKEN_SECRET, AUTH_TOKEN_TTL_SECONDS, WEB_CONCURRENCY
+
+if AUTH_TOKEN_SECRET:
+    _KEY = AUTH_TOKEN_SECRET.encode()
+elif WEB_CONCURRENCY > 1:
+    # Each worker would sign with its own key and reject the others' tokens
+    raise RuntimeError(
+        f"AUTH_TOKEN_SECRET must be set when running {WEB_CONCURRENCY} workers (WEB_CONCURRENCY)"
+    )
+else:
+    print(
+        "⚠️ AUTH_TOKEN_SECRET is not set: signing login tokens with a random per-process key. "
+        "Tokens are rejected by other workers and invalidated on restart; "
+        "set AUTH_TOKEN_SECRET before running more than one worker."
+    )
+    _KEY = secrets.token_bytes(32)
+
+
+class InvalidTokenError(ValueError):
+    pass
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + "=" * (-len(text) % 4))
+
+
+def _sign(payload):
+    return hmac.new(_KEY, payload.encode(), hashlib.sha256).digest()
+
+
+def issue_token(username, role, ttl_seconds=AUTH_TOKEN_TTL_SECONDS):
+    """Return a signed token for the user and role, valid for ttl_seconds"""
+    now = int(time.time())
+    claims = {"sub": username, "role": role.lower(), "iat": now, "exp": now + ttl_seconds}
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+    return f"{payload}.{_b64encode(_sign(payload))}"
+
+
+def verify_token(token):
+    """Return the claims of a valid token; raise InvalidTokenError otherwise"""
+    try:
+        payload, signature = token.split(".")
+        valid = hmac.compare_digest(_b64decode(signature), _sign(payload))
+    except (ValueError, TypeError):
+        raise InvalidTokenError("Malformed token")
+    if not valid:
+        raise InvalidTokenError("Invalid token signature")
+
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise InvalidTokenError("Malformed token")
+    if claims.get("exp", 0) < time.time():
+        raise InvalidTokenError("Token expired")
+    return claims
@@ -1,27 +1,72 @@
-from sqlalchemy.orm import Session
-from .models import User, Role
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload, joinedload
+from .models import User, Role, RoleCategory
 from core.security import hash_password
+from services.rag.role_acl import role_acl
 
 # ROLES
-def create_role(db: Session, name: str, description: str):
+def _normalize_categories(categories):
+    return list(dict.fromkeys(c.strip().lower() for c in categories if c.strip()))
+
+def create_role(db: Session, name: str, description: str, categories: list[str] | None = None):
+    # A new role reads its own category plus any granted at creation
     role = Role(name=name, description=description)
+    role.categories = [
+        RoleCategory(category=category) for category in _normalize_categories([name, *(categories or [])])
+    ]
     db.add(role)
     db.commit()
     db.refresh(role)
+    refresh_role_acl(db)
     return role
 
-def get_roles(db: Session):
-    return db.query(Role).all()
+def get_roles_page(db: Session, limit: int | None, after_id: int | None = None):
+    """
+    Roles ordered by id after the cursor; returns (roles, last id if more remain).
+    limit=None returns every remaining role.
+    """
+    query = db.query(Role)
+    if after_id is not None:
+        query = query.filter(Role.id > after_id)
+    if limit is None:
+        return query.order_by(Role.id).all(), None
+    roles = query.order_by(Role.id).limit(limit + 1).all()
+    if len(roles) > limit:
+        return roles[:limit], roles[limit - 1].id
+    return roles, None
 
 def get_role_by_name(db: Session, name: str):
     return db.query(Role).filter(Role.name == name).first()
 
 
+# ROLE → CATEGORY ACL
+def get_role_categories(db: Session):
+    roles = db.query(Role).options(selectinload(Role.categories)).all()
+    return {role.name: [c.category for c in role.categories] for role in roles}
+
+def grant_role_categories(db: Session, role: Role, categories: list[str]):
+    """Let a role read more category partitions; returns all its categories"""
+    current = {c.category for c in role.categories}
+    for category in _normalize_categories(categories):
+        if category not in current:
+            role.categories.append(RoleCategory(category=category))
+    db.commit()
+    db.refresh(role)
+    refresh_role_acl(db)
+    return [c.category for c in role.categories]
+
+def refresh_role_acl(db: Session):
+    """Reload the in-memory ACL retrieval reads from"""
+    role_acl.replace(get_role_categories(db))
+
+
 # USERS
-def create_user(db: Session, username: str, password: str, role: Role):
+def create_user(db: Session, username: str, password: str, role: Role, password_hash: str | None = None):
+    # Async handlers pass a hash computed on the password pool
     user = User(
         username=username,
-        password_hash=hash_password(password),
+        password_hash=password_hash or hash_password(password),
         role=role
     )
     db.add(user)
@@ -32,6 +77,49 @@ def create_user(db: Session, username: str, password: str, role: Role):
 def get_user_by_username(db: Session, username: str):
     return db.query(User).filter(User.username == username).first()
 
-def get_users(db: Session):
-    return db.query(User).all()
+def _prefix_upper_bound(prefix: str):
+    """Smallest string greater than every string starting with prefix"""
+    last = ord(prefix[-1])
+    return prefix[:-1] + chr(last + 1) if last < 0x10FFFF else None
 
+def get_users_page(db: Session, limit: int | None, after_username: str | None = None, prefix: str | None = None):
+    """
+    Users ordered by username after the cursor, optionally only those whose
+    username starts with prefix; returns (users, last username if more remain).
+    limit=None returns every remaining user.
+    Prefix and cursor are ranges on the users.username index (LIKE would not
+    use it), and roles come in the same query.
+    """
+    query = db.query(User).options(joinedload(User.role))
+    if prefix:
+        query = query.filter(User.username >= prefix)
+        upper = _prefix_upper_bound(prefix)
+        if upper is not None:
+            query = query.filter(User.username < upper)
+    if after_username is not None:
+        query = query.filter(User.username > after_username)
+    if limit is None:
+        return query.order_by(User.username).all(), None
+    users = query.order_by(User.username).limit(limit + 1).all()
+    if len(users) > limit:
+        return users[:limit], users[limit - 1].username
+    return users, None
+
+
+# ASYNC (AsyncSession from dependencies.db.get_async_db)
+async def aget_role_by_name(db: AsyncSession, name: str):
+    result = await db.execute(select(Role).where(Role.name == name))
+    return result.scalars().first()
+
+async def aget_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(
+        select(User).options(selectinload(User.role)).where(User.username == username)
+    )
+    return result.scalars().first()
+
+async def acreate_user(db: AsyncSession, username: str, password_hash: str, role: Role):
+    user = User(username=username, password_hash=password_hash, role=role)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user, ["role"])
+    return user
@@ -1,16 +1,77 @@
-from sqlalchemy import create_engine
+import os
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pathlib import Path
+from core.config import (
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT,
+    SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS
+)
 
 BASE_DIR = Path(__file__).resolve().parents[3]   # Role-Based-Rag-Chatbot
 DB_PATH = BASE_DIR / "app.db"
 
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+# Overridable so load tests can point at a scratch database
+DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{DB_PATH}")
+
+# Same database through an async driver (aiosqlite for SQLite)
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Runs on every new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _engine_options(url):
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}
+    else:
+        options["pool_pre_ping"] = True
+    return options
+
+
+def make_engine(url=DATABASE_URL):
+    """Pooled engine; SQLite connections get WAL, busy timeout and synchronous pragmas"""
+    engine = create_engine(url, **_engine_options(url))
+    if url.startswith("sqlite"):
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+
+def make_async_engine(url=ASYNC_DATABASE_URL):
+    """Async counterpart of make_engine (aiosqlite for SQLite, greenlet via sqlalchemy[asyncio])"""
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(url, **_engine_options(url))
+    if url.startswith("sqlite"):
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+_async_sessionmaker = None
+
+
+def get_async_sessionmaker():
+    """Async sessions for the login and user-creation routes, created on first use"""
+    global _async_sessionmaker
+    if _async_sessionmaker is None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker
+
+        _async_sessionmaker = async_sessionmaker(make_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_sessionmaker
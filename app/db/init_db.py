@@ -1,5 +1,8 @@
 from .database import engine, SessionLocal
-from .models import Base, Role
+from .models import Base, Role, RoleCategory
+from .crud import refresh_role_acl, create_user, get_user_by_username, get_role_by_name
+from services.rag.role_acl import DEFAULT_ROLE_CATEGORIES
+from core.config import USER_ADMIN_ROLES, BOOTSTRAP_ADMIN_USERNAME, BOOTSTRAP_ADMIN_PASSWORD
 
 def init_db():
     Base.metadata.create_all(bind=engine)
@@ -21,4 +24,27 @@ def init_db():
             db.add(Role(name=role, description=f"{role} role"))
 
     db.commit()
+
+    # Grant the built-in ACL to roles that have none yet (also existing databases)
+    for role in db.query(Role).filter(~Role.categories.any()).all():
+        categories = DEFAULT_ROLE_CATEGORIES.get(role.name, [role.name.lower()])
+        role.categories = [RoleCategory(category=category) for category in categories]
+
+    db.commit()
+    refresh_role_acl(db)
+
+    # /users/ needs an admin token, so the first admin is created here
+    if BOOTSTRAP_ADMIN_USERNAME and BOOTSTRAP_ADMIN_PASSWORD and USER_ADMIN_ROLES:
+        if not get_user_by_username(db, BOOTSTRAP_ADMIN_USERNAME):
+            role = get_role_by_name(db, USER_ADMIN_ROLES[0])
+            if role:
+                create_user(db, BOOTSTRAP_ADMIN_USERNAME, BOOTSTRAP_ADMIN_PASSWORD, role)
+                print(f"👤 Created admin user {BOOTSTRAP_ADMIN_USERNAME} ({role.name})")
+            else:
+                print(f"⚠️ Admin role {USER_ADMIN_ROLES[0]} not found, no admin user created")
+
     db.close()
+
+
+if __name__ == "__main__":
+    init_db()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .database import Base
 
@@ -10,6 +10,19 @@ class Role(Base):
     description = Column(String)
 
     users = relationship("User", back_populates="role")
+    categories = relationship("RoleCategory", back_populates="role", cascade="all, delete-orphan")
+
+
+class RoleCategory(Base):
+    """A category partition a role may retrieve from"""
+    __tablename__ = "role_categories"
+    __table_args__ = (UniqueConstraint("role_id", "category"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    role_id = Column(Integer, ForeignKey("roles.id"), index=True, nullable=False)
+    category = Column(String, nullable=False)
+
+    role = relationship("Role", back_populates="categories")
 
 
 class User(Base):
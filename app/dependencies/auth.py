@@ -0,0 +1,33 @@
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from core.tokens import verify_token, InvalidTokenError
+from core.config import INGEST_ADMIN_ROLES, USER_ADMIN_ROLES
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def get_current_user(credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme)):
+    """Claims of the request's login token (sub, role, exp); 401 if missing or invalid"""
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    try:
+        return verify_token(credentials.credentials)
+    except InvalidTokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+def require_ingest_admin(user: dict = Depends(get_current_user)):
+    if user["role"] not in INGEST_ADMIN_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role may not ingest documents")
+    return user
+
+def require_user_admin(user: dict = Depends(get_current_user)):
+    if user["role"] not in USER_ADMIN_ROLES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Role may not manage users or roles")
+    return user
@@ -1,4 +1,4 @@
-from db.database import SessionLocal
+from db.database import SessionLocal, get_async_sessionmaker
 
 def get_db():
     db = SessionLocal()
@@ -6,3 +6,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Async session for handlers that await the database instead of blocking the loop"""
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,11 +1,66 @@
-from fastapi import FastAPI
-from api import roles, users, auth,chat,create_embeddings
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from sqlalchemy.exc import SQLAlchemyError
+from api import roles, users, auth,chat,create_embeddings, metrics
 from db.init_db import init_db
+from db.crud import refresh_role_acl
+from db.database import SessionLocal, engine
+from db.models import Base
+from core.metrics import HTTP_REQUESTS, HTTP_REQUEST_SECONDS, HTTP_IN_PROGRESS
+from core.config import ROLE_ACL_REFRESH_SECONDS
+from services.rag.role_acl import role_acl
+
+
+def load_role_acl():
+    db = SessionLocal()
+    try:
+        refresh_role_acl(db)
+    except SQLAlchemyError as e:
+        print(f"⚠️ Role ACL not loaded, keeping the current map: {e}")
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Databases created before role_categories existed get the new table
+    try:
+        Base.metadata.create_all(bind=engine)
+    except SQLAlchemyError as e:
+        # Another worker starting at the same time may have created it first
+        print(f"⚠️ Could not create tables: {e}")
+
+    # Compile the role → category ACL per worker; chat never queries it from the DB
+    load_role_acl()
+    role_acl.start_refresher(load_role_acl, ROLE_ACL_REFRESH_SECONDS)
+    yield
+
+
+app = FastAPI(title="RBAC Chatbot Backend", lifespan=lifespan)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    HTTP_IN_PROGRESS.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_PROGRESS.dec()
+        # Label by route template (/users/{user_id}), not the raw path, to bound cardinality
+        route = request.scope.get("route")
+        route = route.path if route is not None else "unmatched"
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, method=request.method, route=route)
+        HTTP_REQUESTS.inc(method=request.method, route=route, status=status)
 
-app = FastAPI(title="RBAC Chatbot Backend")
 
 app.include_router(roles.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(chat.router)
 app.include_router(create_embeddings.router)
+app.include_router(metrics.router)
@@ -2,4 +2,5 @@ from pydantic import BaseModel
 
 class ChatRequest(BaseModel):
     user_query: str
-    user_role: str = "engineering"
\ No newline at end of file
+    # Deprecated: the role comes from the login token; a different value is rejected
+    user_role: str | None = None
\ No newline at end of file
@@ -3,6 +3,15 @@ from pydantic import BaseModel
 class RoleCreate(BaseModel):
     name: str
     description: str | None = None
+    # Category partitions readable besides the role's own
+    categories: list[str] = []
+
+class RoleCategoriesGrant(BaseModel):
+    categories: list[str]
+
+class RoleCategoriesResponse(BaseModel):
+    role: str
+    categories: list[str]
 
 class RoleResponse(BaseModel):
     id: int
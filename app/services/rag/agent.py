@@ -1,23 +1,103 @@
+import asyncio
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.agents import create_agent
-from langchain_community.vectorstores import FAISS
-from langchain_core.tools import tool
+from langchain.agents.middleware import dynamic_prompt, ModelRequest, AgentMiddleware
+from langchain.tools import tool, ToolRuntime
 from dotenv import load_dotenv
 from pydantic import BaseModel
-from langchain.messages import HumanMessage,AIMessage,ToolMessage
+from langchain.messages import HumanMessage,AIMessage,AIMessageChunk,ToolMessage
 import json
-from pathlib import Path
+from dataclasses import dataclass
+from services.rag.index_store import PartitionedIndex, split_legacy_index
+from services.rag.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+from services.rag.answer_cache import SemanticAnswerCache
+from services.rag.ann import configured_ann
+from services.rag.retrieval import Retriever, categories_for_role
+from core.config import (
+    QUERY_EMBEDDING_CACHE_SIZE, QUERY_EMBEDDING_CACHE_PATH,
+    ANSWER_CACHE_ENABLED, ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_MAX_ENTRIES,
+    INDEX_MMAP, INDEX_WATCH_INTERVAL_SECONDS,
+    RETRIEVAL_MODE, HYBRID_CANDIDATE_MULTIPLIER, MMR_ENABLED, FAISS_INDEX_DIR
+)
+from core.metrics import rag_stage, ANSWER_CACHE_LOOKUPS
 
 load_dotenv()
 
-base_dir = Path(__file__).resolve().parents[3]
-
-faiss_path = base_dir / "faiss_index"
+faiss_path = FAISS_INDEX_DIR
 
 llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash")
 
-embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+# Repeated questions are served from the query cache instead of a remote embed_query call
+query_embedding_cache = QueryEmbeddingCache(
+    max_entries=QUERY_EMBEDDING_CACHE_SIZE,
+    disk_path=QUERY_EMBEDDING_CACHE_PATH
+)
+embedding_model = CachedEmbeddings(
+    GoogleGenerativeAIEmbeddings(model="models/embedding-001"),
+    query_embedding_cache
+)
+
+# One FAISS partition per category, memory-mapped so all workers share the
+# vectors, and reloaded only when create_embeddings publishes a new version.
+# IVF/HNSW segments get their nprobe/efSearch from the INDEX_* settings
+ann_config = configured_ann()
+partitioned_index = PartitionedIndex(faiss_path, embedding_model, mmap=INDEX_MMAP, ann=ann_config)
+
+# An index written before partitioning is split once, reusing its stored vectors
+split_legacy_index(faiss_path, embedding_model, build_store=ann_config.build_store)
+
+# Warm all partitions and pick up new versions in the background
+partitioned_index.start_watcher(INDEX_WATCH_INTERVAL_SECONDS)
+
+# Vector, hybrid (BM25 + vector) or lexical search, diversified with MMR
+retriever = Retriever(
+    partitioned_index,
+    embedding_model,
+    mode=RETRIEVAL_MODE,
+    candidate_multiplier=HYBRID_CANDIDATE_MULTIPLIER,
+    mmr_enabled=MMR_ENABLED
+)
+
+# Final answers per role, reused for near-identical questions until the TTL
+# passes or one of the role's partitions publishes a new version
+answer_cache = SemanticAnswerCache(
+    threshold=ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+    max_entries_per_role=ANSWER_CACHE_MAX_ENTRIES
+)
+
+
+def role_partition_versions(user_role):
+    categories, _ = categories_for_role(user_role)
+    return {category: partitioned_index.published_version(category) for category in categories}
+
+
+async def lookup_cached_answer(message, user_role):
+    """Return (query_embedding, versions, cached_result); a failed lookup is a miss"""
+    # Lexical mode never calls the embedding API, so there is no vector to match on
+    if not ANSWER_CACHE_ENABLED or RETRIEVAL_MODE == "lexical":
+        return None, None, None
+    try:
+        with rag_stage("answer_cache_lookup"):
+            # Version files are read off the event loop, alongside the embedding call
+            query_embedding, versions = await asyncio.gather(
+                embedding_model.aembed_query(message),
+                asyncio.to_thread(role_partition_versions, user_role)
+            )
+            cached = answer_cache.lookup(user_role, query_embedding, versions)
+        ANSWER_CACHE_LOOKUPS.inc(result="hit" if cached else "miss")
+        return query_embedding, versions, cached
+    except Exception as e:
+        print(f"⚠️ Answer cache lookup failed: {e}")
+        return None, None, None
+
+
+def store_cached_answer(user_role, query_embedding, versions, result):
+    if query_embedding is None or not result.get("answer"):
+        return
+    answer_cache.store(user_role, query_embedding, versions, result)
 
 # -----------------------------
 # Request & Response Schemas
@@ -27,23 +107,20 @@ class ChatRequest(BaseModel):
     user_role: str = "engineering"
 
 
-@tool("rag_tool", description="Retrieves relevant documents based on user role and user query")
-def rag_tool(query:str,user_role:str):
+@dataclass
+class ChatContext:
+    """Per-request values passed to the shared agent at invoke time"""
+    user_role: str
+
+
+@tool("rag_tool", description="Retrieves relevant documents for the user query from the documents the user's role may read")
+async def rag_tool(query:str,runtime: ToolRuntime[ChatContext]):
+    # The role comes from the runtime context, not from the model's tool arguments
+    user_role = runtime.context.user_role
     print(f"🔍 RAG Tool invoked for role: {user_role} and query: {query}")
     try:
-        vector_store = FAISS.load_local(
-            faiss_path, embedding_model, allow_dangerous_deserialization=True
-        )
-        # Document retrieval based on role
-        if "c-levelexecutives" in user_role:
-            retrieved_docs = vector_store.similarity_search(
-                query, k=5,
-                filter={"category": {"$in": ["engineering", "hr", "finance", "marketing", "general"]}}
-            )
-        elif "employee" in user_role:
-            retrieved_docs = vector_store.similarity_search(query, k=3, filter={"category": "general"})
-        else:
-            retrieved_docs = vector_store.similarity_search(query, k=3, filter={"category": user_role})
+        results = await retriever.search(query, user_role)
+        retrieved_docs = [doc for doc, _ in results]
 
         context_chunks = []
         sources = []
@@ -87,21 +164,67 @@ def extract_text(content):
     # Fallback
     return str(content)
 
-# Streaming chat endpoint
-def query(message,user_role):
-    """
-    Streaming endpoint that sends response chunks as Server-Sent Events (SSE)
-    """
-
-    agent = create_agent(llm,tools=[rag_tool],system_prompt=f"""You are an AI assistant at FinSolve Technologies.call rag_tool when need with:
+@dynamic_prompt
+def role_system_prompt(request: ModelRequest) -> str:
+    """Bakes the caller's role into the system prompt at run time"""
+    user_role = request.runtime.context.user_role
+    return f"""You are an AI assistant at FinSolve Technologies.call rag_tool when need.
     - user_role = {user_role}
 
-    Use the retrieved context to answer accurately.""")
+    Use the retrieved context to answer accurately."""
+
+
+class StageTimingMiddleware(AgentMiddleware):
+    """Times each LLM call (first, or final after a tool result) and each tool call"""
+
+    @staticmethod
+    def _model_stage(request):
+        if request.messages and isinstance(request.messages[-1], ToolMessage):
+            return "llm_final_call"
+        return "llm_first_call"
 
+    def wrap_model_call(self, request, handler):
+        with rag_stage(self._model_stage(request)):
+            return handler(request)
 
-    result  = agent.invoke(
-        {"messages": [HumanMessage(message)]}
-    )
+    async def awrap_model_call(self, request, handler):
+        with rag_stage(self._model_stage(request)):
+            return await handler(request)
+
+    def wrap_tool_call(self, request, handler):
+        with rag_stage("tool_call"):
+            return handler(request)
+
+    async def awrap_tool_call(self, request, handler):
+        with rag_stage("tool_call"):
+            return await handler(request)
+
+
+# Built once per process: the role is passed per request through ChatContext,
+# so agent construction and tool schema generation stay off the request path
+agent = create_agent(
+    llm,
+    tools=[rag_tool],
+    middleware=[role_system_prompt, StageTimingMiddleware()],
+    context_schema=ChatContext
+)
+
+
+async def query(message,user_role):
+    """
+    Runs the shared agent for one chat turn and returns
+    (tool_used, tool_name, final_answer, sources)
+    """
+    query_embedding, versions, cached = await lookup_cached_answer(message, user_role)
+    if cached:
+        print(f"⚡ Answer cache hit for role: {user_role}")
+        return cached["tool_used"], cached["tool_name"], cached["answer"], cached["sources"]
+
+    with rag_stage("agent"):
+        result  = await agent.ainvoke(
+            {"messages": [HumanMessage(message)]},
+            context=ChatContext(user_role=user_role)
+        )
 
     tool_used = False
     tool_name = None
@@ -127,5 +250,88 @@ def query(message,user_role):
         if isinstance(msg, AIMessage) and not msg.tool_calls:
             final_answer = extract_text(msg.content)
 
+    store_cached_answer(user_role, query_embedding, versions, {
+        "tool_used": tool_used,
+        "tool_name": tool_name,
+        "answer": final_answer,
+        "sources": sources
+    })
 
     return tool_used,tool_name,final_answer,sources
+
+
+async def stream_query(message,user_role):
+    """
+    Runs the shared agent for one chat turn and yields (event, data) pairs as they happen:
+    tool_start when the model calls a tool, sources when the tool returns,
+    token for each piece of answer text, and done with the full result.
+    The answer in done is the model's last message without tool calls; streamed
+    tokens only drive the token events, so non-streaming models still answer
+    """
+    query_embedding, versions, cached = await lookup_cached_answer(message, user_role)
+    if cached:
+        print(f"⚡ Answer cache hit for role: {user_role}")
+        if cached["tool_used"]:
+            yield "tool_start", {"tool_name": cached["tool_name"]}
+            yield "sources", {"sources": cached["sources"]}
+        yield "token", {"text": cached["answer"]}
+        yield "done", {**cached, "cached": True}
+        return
+
+    tool_used = False
+    tool_name = None
+    answer_parts = []
+    final_answer = None
+    sources = []
+
+    with rag_stage("agent"):
+        async for mode, chunk in agent.astream(
+            {"messages": [HumanMessage(message)]},
+            context=ChatContext(user_role=user_role),
+            stream_mode=["messages", "updates"]
+        ):
+            # LLM tokens as they arrive
+            if mode == "messages":
+                msg, metadata = chunk
+                if isinstance(msg, AIMessageChunk) and metadata.get("langgraph_node") == "model":
+                    text = extract_text(msg.content)
+                    if text:
+                        answer_parts.append(text)
+                        yield "token", {"text": text}
+                continue
+
+            # Completed node outputs: tool calls, tool results and the final answer
+            for node_output in chunk.values():
+                if not isinstance(node_output, dict):
+                    continue
+                for msg in node_output.get("messages", []):
+                    if isinstance(msg, AIMessage) and msg.tool_calls:
+                        tool_used = True
+                        tool_name = msg.tool_calls[0]["name"]
+                        # Text emitted before a tool call is not part of the final answer
+                        answer_parts = []
+                        yield "tool_start", {"tool_name": tool_name}
+
+                    elif isinstance(msg, AIMessage):
+                        final_answer = extract_text(msg.content)
+                        # Nothing was streamed for it (non-streaming model): send it whole
+                        if final_answer and not answer_parts:
+                            answer_parts.append(final_answer)
+                            yield "token", {"text": final_answer}
+
+                    if isinstance(msg, ToolMessage):
+                        try:
+                            sources = json.loads(msg.content).get("sources", [])
+                        except Exception:
+                            sources = []
+                        yield "sources", {"sources": sources}
+
+    result = {
+        "tool_used": tool_used,
+        "tool_name": tool_name,
+        "answer": final_answer if final_answer is not None else "".join(answer_parts),
+        "sources": sources
+    }
+    store_cached_answer(user_role, query_embedding, versions, result)
+
+    yield "done", {**result, "cached": False}
@@ -0,0 +1,133 @@
+"""
+ann.py
+------
+Approximate nearest-neighbour index types for FAISS segments.
+
+LangChain's FAISS store uses an exact flat index, so every query scans all
+vectors. Large segments can instead be built as IVF-Flat, HNSW or IVF-PQ.
+Training happens when the segment is built (at ingest or merge time), and
+the search parameters (nprobe, efSearch) are applied when a segment is
+loaded, so they can be tuned without rebuilding. Segments smaller than
+min_chunks stay flat: brute force is fast and exact there.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+from langchain_core.documents import Document
+
+from core.config import (
+    INDEX_TYPE, INDEX_ANN_MIN_CHUNKS, INDEX_IVF_NLIST, INDEX_PQ_M, INDEX_PQ_NBITS,
+    INDEX_HNSW_M, INDEX_HNSW_EF_CONSTRUCTION, INDEX_IVF_NPROBE, INDEX_HNSW_EF_SEARCH
+)
+
+INDEX_TYPES = ("flat", "ivf_flat", "hnsw", "ivf_pq")
+
+# Lossy index types keep exact vectors next to the index so a merge can
+# rebuild from them instead of from quantized reconstructions
+LOSSY_INDEX_TYPES = ("ivf_pq",)
+
+# FAISS wants ~39 training points per IVF list
+MIN_POINTS_PER_LIST = 39
+
+
+@dataclass
+class AnnConfig:
+    index_type: str = "flat"
+    nlist: int = 1024
+    pq_m: int = 64
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+    nprobe: int = 16
+    ef_search: int = 64
+    min_chunks: int = 5000
+
+    def __post_init__(self):
+        if self.index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type {self.index_type!r}, expected one of {INDEX_TYPES}")
+
+    def effective_type(self, count):
+        """Index type a segment of `count` vectors is built with"""
+        if self.index_type == "flat" or count < self.min_chunks:
+            return "flat"
+        if self.index_type == "ivf_pq" and count < 2 ** self.pq_nbits:
+            return "flat"
+        return self.index_type
+
+    def build_index(self, vectors):
+        """Create, train and fill a FAISS index for a (count, dim) float32 array"""
+        faiss = dependable_faiss_import()
+        count, dim = vectors.shape
+        index_type = self.effective_type(count)
+
+        if index_type == "flat":
+            index = faiss.IndexFlatL2(dim)
+        elif index_type == "hnsw":
+            index = faiss.IndexHNSWFlat(dim, self.hnsw_m)
+            index.hnsw.efConstruction = self.ef_construction
+        else:
+            nlist = max(1, min(self.nlist, count // MIN_POINTS_PER_LIST))
+            quantizer = faiss.IndexFlatL2(dim)
+            if index_type == "ivf_flat":
+                index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+            else:
+                index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim, self.pq_m), self.pq_nbits)
+            index.train(vectors)
+            # Keeps reconstruct() working for merges and LangChain helpers
+            index.make_direct_map()
+
+        index.add(vectors)
+        self.tune(index)
+        return index
+
+    def build_store(self, text_embeddings, embedding, metadatas, ids):
+        """Drop-in for FAISS.from_embeddings that builds the configured index type"""
+        vectors = np.asarray([vector for _, vector in text_embeddings], dtype=np.float32)
+        index = self.build_index(vectors)
+
+        docstore = InMemoryDocstore({
+            doc_id: Document(page_content=text, metadata=metadata, id=doc_id)
+            for doc_id, (text, _), metadata in zip(ids, text_embeddings, metadatas)
+        })
+        store = FAISS(embedding, index, docstore, dict(enumerate(ids)))
+        if self.effective_type(len(vectors)) in LOSSY_INDEX_TYPES:
+            store.raw_vectors = vectors
+        return store
+
+    def tune(self, index):
+        """Apply the search-time parameters to a loaded or freshly built index"""
+        faiss = dependable_faiss_import()
+        if hasattr(index, "hnsw"):
+            index.hnsw.efSearch = self.ef_search
+            return
+        try:
+            faiss.extract_index_ivf(index).nprobe = self.nprobe
+        except RuntimeError:
+            pass  # flat index: nothing to tune
+
+
+def _pq_subquantizers(dim, requested):
+    """PQ needs the sub-quantizer count to divide the dimension"""
+    for m in range(min(requested, dim), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def configured_ann():
+    """AnnConfig built from the INDEX_* settings"""
+    return AnnConfig(
+        index_type=INDEX_TYPE,
+        nlist=INDEX_IVF_NLIST,
+        pq_m=INDEX_PQ_M,
+        pq_nbits=INDEX_PQ_NBITS,
+        hnsw_m=INDEX_HNSW_M,
+        ef_construction=INDEX_HNSW_EF_CONSTRUCTION,
+        nprobe=INDEX_IVF_NPROBE,
+        ef_search=INDEX_HNSW_EF_SEARCH,
+        min_chunks=INDEX_ANN_MIN_CHUNKS
+    )
@@ -0,0 +1,96 @@
+"""
+answer_cache.py
+---------------
+Semantic cache of final chat answers, kept per role.
+
+A new question reuses a cached answer when its query embedding is close
+enough (cosine similarity) to one asked before by the same role. Every entry
+remembers the published version of each partition the role reads, so an
+entry is dropped as soon as create_embeddings publishes a new version of
+any of those categories, in this process or another one.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+
+@dataclass
+class CachedAnswer:
+    vector: np.ndarray
+    result: dict
+    versions: dict
+    created_at: float = field(default_factory=time.time)
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype="float32")
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """Per-role answers looked up by query-embedding similarity, with a TTL"""
+
+    def __init__(self, threshold=0.95, ttl_seconds=3600, max_entries_per_role=500):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_role = max_entries_per_role
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidated = 0
+
+    def lookup(self, role, vector, versions):
+        """
+        Return the cached result for the most similar earlier question,
+        or None. `versions` are the current partition versions for the role.
+        """
+        query = _unit(vector)
+        now = time.time()
+
+        with self._lock:
+            live = []
+            for entry in self._entries.get(role, []):
+                if now - entry.created_at > self.ttl_seconds:
+                    self.expired += 1
+                elif entry.versions != versions:
+                    self.invalidated += 1
+                else:
+                    live.append(entry)
+            self._entries[role] = live
+
+            if live:
+                scores = np.stack([entry.vector for entry in live]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    self.hits += 1
+                    return live[best].result
+
+            self.misses += 1
+            return None
+
+    def store(self, role, vector, versions, result):
+        entry = CachedAnswer(vector=_unit(vector), result=result, versions=dict(versions))
+        with self._lock:
+            entries = self._entries.setdefault(role, [])
+            entries.append(entry)
+            if len(entries) > self.max_entries_per_role:
+                del entries[:len(entries) - self.max_entries_per_role]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": sum(len(entries) for entries in self._entries.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "invalidated": self.invalidated,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+        }
@@ -0,0 +1,281 @@
+"""
+embedding_cache.py
+------------------
+Caches in front of the embedding model.
+
+Query vectors are kept in a bounded in-memory LRU keyed by model name and
+normalized query text, with an optional SQLite tier that survives restarts,
+so repeated questions skip the remote embed_query call.
+
+Chunk vectors are content-addressed: a persistent table maps the hash of
+(model, chunk text) to its vector, so re-ingesting a document only embeds
+chunks that are new or changed.
+"""
+
+import asyncio
+import hashlib
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+from langchain_core.embeddings import Embeddings
+
+
+def normalize_query(text):
+    """Lowercase and collapse whitespace so trivially different queries share a key"""
+    return " ".join(text.lower().split())
+
+
+def model_name(embeddings):
+    return getattr(embeddings, "model", None) or type(embeddings).__name__
+
+
+def _pack(vector):
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob):
+    vector = array("f")
+    vector.frombytes(blob)
+    return vector.tolist()
+
+
+def content_key(model, text):
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+
+class SqliteVectorStore:
+    """Tiny key -> float32 vector table used as the on-disk cache tier"""
+
+    # Stay well below SQLite's bound-parameter limit
+    BATCH_SIZE = 500
+
+    def __init__(self, path, table):
+        self.path = str(path)
+        self.table = table
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT vector FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def put(self, key, vector):
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, vector) VALUES (?, ?)",
+                (key, _pack(vector))
+            )
+            self._conn.commit()
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        with self._lock:
+            for start in range(0, len(keys), self.BATCH_SIZE):
+                batch = keys[start:start + self.BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM {self.table} WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update((key, _unpack(blob)) for key, blob in rows)
+        return found
+
+    def put_many(self, items):
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, vector) VALUES (?, ?)",
+                [(key, _pack(vector)) for key, vector in items]
+            )
+            self._conn.commit()
+
+
+class QueryEmbeddingCache:
+    """Bounded LRU of query vectors with an optional on-disk tier"""
+
+    def __init__(self, max_entries=1024, disk_path=None):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk = SqliteVectorStore(disk_path, "query_embeddings") if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model, text):
+        return hashlib.sha256(f"{model}\0{normalize_query(text)}".encode("utf-8")).hexdigest()
+
+    def _get_memory(self, key):
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            return vector
+
+    def _get_disk(self, key):
+        vector = self._disk.get(key)
+        if vector is not None:
+            with self._lock:
+                self.disk_hits += 1
+            self._remember(key, vector)
+        return vector
+
+    def _miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def get(self, key):
+        vector = self._get_memory(key)
+        if vector is None and self._disk is not None:
+            vector = self._get_disk(key)
+        if vector is None:
+            self._miss()
+        return vector
+
+    async def aget(self, key):
+        """Like get, but the SQLite tier is read off the event loop"""
+        vector = self._get_memory(key)
+        if vector is None and self._disk is not None:
+            vector = await asyncio.to_thread(self._get_disk, key)
+        if vector is None:
+            self._miss()
+        return vector
+
+    def put(self, key, vector):
+        self._remember(key, vector)
+        if self._disk is not None:
+            self._disk.put(key, vector)
+
+    async def aput(self, key, vector):
+        self._remember(key, vector)
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.put, key, vector)
+
+    def _remember(self, key, vector):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ChunkEmbeddingCache:
+    """Persistent content hash -> vector map for document chunks"""
+
+    def __init__(self, disk_path):
+        self._store = SqliteVectorStore(disk_path, "chunk_embeddings")
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, model, texts):
+        """
+        Return (keys, cached, missing): the content key of every text, the
+        vectors already known by key, and the indexes of texts to embed.
+        Identical texts are embedded once.
+        """
+        keys = [content_key(model, text) for text in texts]
+        cached = self._store.get_many(set(keys))
+
+        missing, seen = [], set()
+        for i, key in enumerate(keys):
+            if key not in cached and key not in seen:
+                seen.add(key)
+                missing.append(i)
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return keys, cached, missing
+
+    def store(self, keys, missing, vectors, cached):
+        """Persist vectors embedded for `missing` and add them to `cached`"""
+        new_items = [(keys[i], list(vector)) for i, vector in zip(missing, vectors)]
+        self._store.put_many(new_items)
+        cached.update(new_items)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an Embeddings model. embed_query is served from QueryEmbeddingCache
+    and embed_documents from ChunkEmbeddingCache; either cache is optional.
+    """
+
+    def __init__(self, embeddings, query_cache=None, chunk_cache=None):
+        self.embeddings = embeddings
+        self.query_cache = query_cache
+        self.chunk_cache = chunk_cache
+        self.model = model_name(embeddings)
+
+    def embed_query(self, text):
+        if self.query_cache is None:
+            return self.embeddings.embed_query(text)
+
+        key = self.query_cache.key(self.model, text)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = list(self.embeddings.embed_query(text))
+            self.query_cache.put(key, vector)
+        return vector
+
+    async def aembed_query(self, text):
+        if self.query_cache is None:
+            return await self.embeddings.aembed_query(text)
+
+        key = self.query_cache.key(self.model, text)
+        vector = await self.query_cache.aget(key)
+        if vector is None:
+            vector = list(await self.embeddings.aembed_query(text))
+            await self.query_cache.aput(key, vector)
+        return vector
+
+    def embed_documents(self, texts):
+        if self.chunk_cache is None:
+            return self.embeddings.embed_documents(texts)
+
+        keys, cached, missing = self.chunk_cache.lookup(self.model, texts)
+        if missing:
+            vectors = self.embeddings.embed_documents([texts[i] for i in missing])
+            self.chunk_cache.store(keys, missing, vectors, cached)
+        return [cached[key] for key in keys]
+
+    async def aembed_documents(self, texts):
+        if self.chunk_cache is None:
+            return await self.embeddings.aembed_documents(texts)
+
+        keys, cached, missing = self.chunk_cache.lookup(self.model, texts)
+        if missing:
+            vectors = await self.embeddings.aembed_documents([texts[i] for i in missing])
+            self.chunk_cache.store(keys, missing, vectors, cached)
+        return [cached[key] for key in keys]
@@ -0,0 +1,165 @@
+"""
+embedding_pipeline.py
+---------------------
+Batched, concurrent and rate-limited embedding of document chunks.
+
+Chunks already in the ChunkEmbeddingCache are resolved first; the rest are
+split into batches that are sent with a bounded number of requests in flight.
+A token bucket keeps requests under the provider's per-minute limit, and
+throttled or transient failures are retried with exponential backoff.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+from services.rag.embedding_cache import model_name
+
+
+class TokenBucket:
+    """Blocking token bucket: `rate` tokens per second, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def is_retryable_error(error):
+    """Throttling (429 / quota) and transient server errors are worth retrying"""
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if code in (429, 500, 502, 503, 504):
+        return True
+
+    text = f"{type(error).__name__} {error}".lower()
+    markers = (
+        "429", "resourceexhausted", "resource_exhausted", "rate limit", "quota",
+        "503", "unavailable", "deadline", "timeout", "timed out",
+    )
+    return any(marker in text for marker in markers)
+
+
+@dataclass
+class PipelineStats:
+    chunks: int = 0
+    cached: int = 0
+    embedded: int = 0
+    batches: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+    @property
+    def chunks_per_second(self):
+        return self.chunks / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (
+            f"{self.chunks} chunks in {self.seconds:.2f}s ({self.chunks_per_second:.1f} chunks/s, "
+            f"{self.embedded} embedded in {self.batches} batches, {self.cached} from cache, "
+            f"{self.retries} retries)"
+        )
+
+
+class EmbeddingPipeline:
+    def __init__(
+        self,
+        embeddings,
+        chunk_cache=None,
+        batch_size=100,
+        max_concurrency=4,
+        requests_per_minute=0,
+        max_retries=5,
+        backoff_base=1.0,
+        backoff_max=60.0
+    ):
+        self.embeddings = embeddings
+        self.chunk_cache = chunk_cache
+        self.model = model_name(embeddings)
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Shared by every run so concurrent ingests respect one provider limit
+        self.rate_limiter = (
+            TokenBucket(rate=requests_per_minute / 60.0, capacity=self.max_concurrency)
+            if requests_per_minute else None
+        )
+
+    def embed(self, texts, progress=None):
+        """
+        Embed `texts` and return (vectors, stats). Vectors keep the input order.
+        `progress(done)` is called with the number of chunks resolved so far.
+        """
+        start = time.perf_counter()
+        stats = PipelineStats(chunks=len(texts))
+
+        if self.chunk_cache is not None:
+            keys, cached, missing = self.chunk_cache.lookup(self.model, texts)
+        else:
+            keys, cached, missing = list(range(len(texts))), {}, list(range(len(texts)))
+
+        stats.cached = len(texts) - len(missing)
+        stats.embedded = len(missing)
+        done = stats.cached
+        if progress:
+            progress(done)
+
+        batches = [missing[i:i + self.batch_size] for i in range(0, len(missing), self.batch_size)]
+        stats.batches = len(batches)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed") as executor:
+            futures = {
+                executor.submit(self._embed_batch, [texts[i] for i in batch]): batch
+                for batch in batches
+            }
+            # Counters are only updated here, in the calling thread: batches
+            # report their retries instead of incrementing shared stats
+            for future in as_completed(futures):
+                batch = futures[future]
+                vectors, retries = future.result()
+                stats.retries += retries
+                if self.chunk_cache is not None:
+                    self.chunk_cache.store(keys, batch, vectors, cached)
+                else:
+                    cached.update(zip(batch, vectors))
+
+                done += len(batch)
+                if progress:
+                    progress(done)
+
+        stats.seconds = time.perf_counter() - start
+        return [list(cached[key]) for key in keys], stats
+
+    def _embed_batch(self, texts):
+        """Return (vectors, retries needed) for one batch"""
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                return self.embeddings.embed_documents(texts), attempt
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable_error(e):
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                attempt += 1
+                print(f"⚠️ Embedding batch throttled ({e}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
@@ -1,226 +1,205 @@
 """
-embed_documents.py
--------------------
-This script loads documents from department folders, splits them into smaller chunks,
-generates embeddings using SentenceTransformer, and saves them in a Chroma vector database
-with department-level role metadata.
+embeddings.py
+-------------
+Ingestion into the partitioned FAISS store: parse and chunk documents,
+embed the chunks through the cached, rate-limited pipeline and publish them
+to the role's partition under faiss_index/<category>/.
+
+Uploaded PDFs come through create_embeddings / create_embeddings_bulk; the
+markdown and CSV corpus under resources/data is synced by services.rag.sync.
 For FinSolve Technologies RAG-based chatbot project.
 """
 
-import os
-import shutil
-from langchain_community.document_loaders import UnstructuredMarkdownLoader, CSVLoader, TextLoader,PyPDFLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+import threading
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
 from dotenv import load_dotenv  
-from pathlib import Path
 from typing import Optional
-import tempfile
-import json
+from services.rag.index_store import partition_name, split_legacy_index
+from services.rag.segments import append_segment, schedule_merge
+from services.rag.parsing import parse_pdf, expand_uploads, get_parse_pool
+from services.rag.embedding_cache import CachedEmbeddings, ChunkEmbeddingCache
+from services.rag.embedding_pipeline import EmbeddingPipeline
+from services.rag.ann import configured_ann
+from core.metrics import INGEST_STAGE_SECONDS, INGEST_CHUNKS, INGEST_FAILURES
+from core.config import (
+    CHUNK_EMBEDDING_CACHE_PATH, EMBED_BATCH_SIZE, EMBED_MAX_CONCURRENCY,
+    EMBED_REQUESTS_PER_MINUTE, EMBED_MAX_RETRIES,
+    INGEST_PARSE_PROCESSES, BULK_INGEST_MAX_BYTES, SEGMENT_MERGE_MAX_DELTAS, INDEX_MMAP,
+    FAISS_INDEX_DIR
+)
 
 load_dotenv()
 
-# -------------------------------
-# Configuration
-# -------------------------------
-# BASE_DIR = Path(
-#     r"E:\Gen AI Roadmap\Gen AI Projects\Rolebased_AI_Chatbot_fintech\ds-rpc-01\resources\data"
-# )
-
-# embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-
-# # -------------------------------
-# # Aggregate all split documents
-# # -------------------------------
-# all_split_docs = []
-
-# for department in os.listdir(BASE_DIR):
-#     dept_path = os.path.join(BASE_DIR, department)
-
-#     if os.path.isdir(dept_path):
-#         print(f"\n🔍 Processing department: {department}")
-#         all_docs = []
-
-#         for file in os.listdir(dept_path):
-#             print('file====',file)
-#             file_path = os.path.join(dept_path, file)
-
-#             try:
-#                 if file.endswith(".md"):
-#                     try:
-#                         loader = UnstructuredMarkdownLoader(file_path, mode="elements",strategy="fast",)
-#                         docs = loader.load()
-#                     except:
-#                         loader = TextLoader(file_path)
-#                         docs = loader.load()
-#                 elif file.endswith(".csv"):
-#                     loader = CSVLoader(file_path)
-#                     docs = loader.load()
-#                 else:
-#                     continue
-
-#                 all_docs.extend(docs)
-
-#             except Exception as e:
-#                 print(f"❌ Failed to load {file}: {e}")
-
-#         if not all_docs:
-#             print(f"⚠️ No documents found for department: {department}")
-#             continue
-
-#         # Split into chunks and tag with metadata
-#         splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-#         split_docs = splitter.split_documents(all_docs)
-#         for doc in split_docs:
-#             doc.metadata = {    # e.g. "engineering"
-#                 "category": "general" if department.lower() == "general" else department.lower(),
-#                 "source": file,
-#             }
-
-#         all_split_docs.extend(split_docs)
-#         print(f"✅ Loaded & split {len(split_docs)} documents for {department}")
-
-# # -------------------------------
-# # Build or refresh FAISS DB
-# # -------------------------------
-# shutil.rmtree('faiss_index', ignore_errors=True)
-
-# # Create FAISS database from already split documents
-# db = FAISS.from_documents(
-#     documents=all_split_docs,  # Use the already split documents
-#     embedding=embedding_model
-# )
-
-# # Save the database
-# faiss_path = r"E:\Gen AI Roadmap\Gen AI Projects\Rolebased_AI_Chatbot_fintech\ds-rpc-01\faiss_index"
-# db.save_local(faiss_path)
-
-# # Create retriever
-# retriever = db.as_retriever(search_kwargs={"k": 5})
-
-# print("\n🔍 Testing retrieval:")
-# results = retriever.invoke("API Gateway")
-# print(f"Retrieved {len(results)} documents")
-# if results:
-#     print(f"Sample result: {results[0].page_content[:200]}...")
-
-# # -------------------------------
-# # Summary
-# # -------------------------------
-# print(f"\n🎉 Successfully stored {len(all_split_docs)} documents in FAISS.")
-
-base_dir = Path(__file__).resolve().parents[3]
-
-FAISS_PATH = base_dir / "faiss_index"
-
-ROLE_ID_FILE = os.path.join(FAISS_PATH, "role_doc_ids.json")
-embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
-
-
-def load_role_doc_ids():
-    if os.path.exists(ROLE_ID_FILE):
-        with open(ROLE_ID_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-def save_role_doc_ids(data):
-    os.makedirs(FAISS_PATH, exist_ok=True)
-    with open(ROLE_ID_FILE, "w") as f:
-        json.dump(data, f, indent=2)
-
-
-def create_embeddings(role, file_bytes: bytes, filename: Optional[str] = None):
-    
+# Root of the partitioned store: one FAISS index per category under FAISS_PATH/<category>/
+FAISS_PATH = FAISS_INDEX_DIR
+
+# Chunks whose content was embedded before are served from the cache, so only
+# new or changed chunks reach the embedding API
+chunk_embedding_cache = ChunkEmbeddingCache(CHUNK_EMBEDDING_CACHE_PATH)
+base_embedding_model = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+embedding_model = CachedEmbeddings(base_embedding_model, chunk_cache=chunk_embedding_cache)
+
+# Batched, concurrent, rate-limited embedding of chunks during ingestion
+embedding_pipeline = EmbeddingPipeline(
+    base_embedding_model,
+    chunk_cache=chunk_embedding_cache,
+    batch_size=EMBED_BATCH_SIZE,
+    max_concurrency=EMBED_MAX_CONCURRENCY,
+    requests_per_minute=EMBED_REQUESTS_PER_MINUTE,
+    max_retries=EMBED_MAX_RETRIES
+)
+
+# Index type (flat, IVF, HNSW, PQ) segments are trained and built with
+ann_config = configured_ann()
+
+# Serializes writers inside this process so two uploads can't interleave a save
+_write_lock = threading.Lock()
+
+
+def _no_progress(stage, **counters):
+    pass
+
+
+def parse_files(role, files, progress=None):
+    """
+    Parse and chunk (filename, bytes) PDFs in the process pool.
+    Returns chunks for all files, in upload order.
+    """
+    progress = progress or _no_progress
+    pool = get_parse_pool(INGEST_PARSE_PROCESSES)
+
+    progress("parsing")
+    with INGEST_STAGE_SECONDS.time(stage="parse"):
+        futures = [pool.submit(parse_pdf, data, filename, role.lower()) for filename, data in files]
+
+        pages = 0
+        split_docs = []
+        for (filename, _), future in zip(files, futures):
+            try:
+                file_pages, file_docs = future.result()
+            except Exception as e:
+                raise ValueError(f"Failed to parse {filename}: {e}") from e
+            pages += file_pages
+            split_docs.extend(file_docs)
+            progress("parsing", pages_parsed=pages)
+
+    return split_docs
+
+
+def commit_documents(role, split_docs, progress=None, removed_sources=()):
+    """
+    Embed chunks and publish them to the role's partition as one delta segment.
+    Chunks already stored for the same sources are replaced, chunks of
+    `removed_sources` are deleted, and other sources in the partition are
+    kept. Only the new chunks are written. Returns the pipeline stats.
+    """
+    progress = progress or _no_progress
+    category = partition_name(role)
+    partition_path = FAISS_PATH / category
+
+    # 1️⃣ Create IDs per source
+    new_ids = []
+    per_source = {}
+    for doc in split_docs:
+        source = doc.metadata["source"]
+        per_source[source] = per_source.get(source, 0) + 1
+        new_ids.append(f"{category}:{source}:{per_source[source]}")
+
+    # 2️⃣ Embed chunks through the pipeline (cached chunks skip the API)
+    print(f"Building {len(split_docs)} embeddings for partition: {category}")
+    progress("embedding", chunks_total=len(split_docs))
+    texts = [doc.page_content for doc in split_docs]
+    with INGEST_STAGE_SECONDS.time(stage="embed"):
+        vectors, stats = embedding_pipeline.embed(
+            texts, progress=lambda done: progress("embedding", chunks_embedded=done)
+        )
+    INGEST_CHUNKS.inc(stats.embedded, source="embedded")
+    INGEST_CHUNKS.inc(stats.cached, source="cached")
+    print(f"⚡ Embedding throughput: {stats.summary()}")
+
+    text_embeddings = list(zip(texts, vectors))
+    metadatas = [doc.metadata for doc in split_docs]
+    replaced_sources = set(per_source) | set(removed_sources)
+
+    with _write_lock, INGEST_STAGE_SECONDS.time(stage="save"):
+        # 3️⃣ Move a pre-partitioning shared index into per-category partitions
+        split_legacy_index(FAISS_PATH, embedding_model, build_store=ann_config.build_store)
+
+        # 4️⃣ Append the chunks as a delta segment; its tombstones hide the
+        # previous chunks of re-uploaded and removed sources
+        progress("saving")
+        segments = append_segment(
+            partition_path,
+            text_embeddings,
+            metadatas,
+            new_ids,
+            embedding_model,
+            removed_sources=replaced_sources,
+            build_store=ann_config.build_store
+        )
+
+    # 5️⃣ Fold deltas into a new base in the background once there are too many
+    if segments:
+        print(f"Published delta segment ({segments} segments in {category})")
+        schedule_merge(
+            partition_path, embedding_model, SEGMENT_MERGE_MAX_DELTAS,
+            build_store=ann_config.build_store, mmap=INDEX_MMAP
+        )
+
+    return stats
+
+
+def create_embeddings(role, file_bytes: bytes, filename: Optional[str] = None, progress=None):
+    """
+    Parse a PDF, embed its chunks and publish them to the role's partition.
+    `progress(stage, **counters)` is called as the ingestion advances.
+    """
     if not file_bytes:
         raise ValueError("No bytes received for ingestion.")
-    
-    temp_path = None
-    
+
     try:
-        # 1️⃣ Create temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            temp_file.write(file_bytes)
-            temp_path = temp_file.name
-        
-        # 2️⃣ Load and split PDF
-        loader = PyPDFLoader(temp_path)
-        docs = loader.load()
-        
-        if not docs:
-            raise ValueError("No content extracted from PDF")
-
-        splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-        split_docs = splitter.split_documents(docs)
-
-        # 3️⃣ Create IDs and update metadata
-        new_ids = []
-        
-        for index, doc in enumerate(split_docs, start=1):
-            doc.metadata = {
-                "source": filename if filename else "unknown",
-                "category": role.lower()
-            }
-            new_ids.append(f"{role.lower()}_{index}")  # Fixed: removed space, added .lower()
-
-        # 4️⃣ Load or create FAISS
-        if os.path.exists(os.path.join(FAISS_PATH, "index.faiss")):  # Fixed: check for actual index file
-            print("Loading existing FAISS index...")
-            vector_store = FAISS.load_local(
-                FAISS_PATH,
-                embedding_model,
-                allow_dangerous_deserialization=True
-            )
-        else:
-            print("Creating new FAISS index...")
-            os.makedirs(FAISS_PATH, exist_ok=True)
-            # Create initial vector store with first documents
-            vector_store = FAISS.from_documents(
-                documents=split_docs,
-                embedding=embedding_model,
-                ids=new_ids
-            )
-            # Save mapping and index
-            role_doc_ids = {role: new_ids}
-            save_role_doc_ids(role_doc_ids)
-            vector_store.save_local(FAISS_PATH)
-            
-            response = f"✅ Embeddings created for role: {role} ({len(split_docs)} chunks)"
-            return response
-        
-        # 5️⃣ Role-based delete (only for existing index)
-        role_doc_ids = load_role_doc_ids()
-        if role in role_doc_ids:
-            old_ids = role_doc_ids[role]
-            print(f"Deleting {len(old_ids)} old embeddings for role: {role}")
-            vector_store.delete(ids=old_ids)
-        
-        # 6️⃣ Add new documents
-        print(f"Adding {len(split_docs)} new embeddings for role: {role}")
-        vector_store.add_documents(documents=split_docs, ids=new_ids)
-
-        # 7️⃣ Save mapping
-        role_doc_ids[role] = new_ids
-        save_role_doc_ids(role_doc_ids)
-
-        # 8️⃣ Save vector store
-        print("Saving vector store...")
-        vector_store.save_local(FAISS_PATH)
-
-        response = f"✅ Embeddings updated for role: {role} ({len(split_docs)} chunks)"
+        split_docs = parse_files(role, [(filename or "unknown", file_bytes)], progress)
+        stats = commit_documents(role, split_docs, progress)
+
+        response = (
+            f"✅ Embeddings updated for role: {role} "
+            f"({len(split_docs)} chunks, {stats.embedded} embedded, {stats.cached} from cache, "
+            f"{stats.chunks_per_second:.1f} chunks/s)"
+        )
         print(response)
         return response
 
     except Exception as e:
+        INGEST_FAILURES.inc(kind="single")
         error_msg = f"❌ Failed to load {filename}: {str(e)}"
         print(error_msg)
         raise ValueError(error_msg)  # Re-raise to handle upstream
-    
-    finally:
-        # 9️⃣ Clean up temporary file
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.unlink(temp_path)
-                print(f"Cleaned up temporary file: {temp_path}")
-            except Exception as e:
-                print(f"Warning: Could not delete temporary file: {e}")
+
+
+def create_embeddings_bulk(role, files, progress=None):
+    """
+    Ingest many PDFs (or zip archives of PDFs) for a role: parse them in the
+    process pool, embed all chunks in one pipeline run and commit a single
+    index update.
+    """
+    try:
+        pdfs = expand_uploads(files, BULK_INGEST_MAX_BYTES)
+        if not pdfs:
+            raise ValueError("No PDF files found in upload")
+
+        split_docs = parse_files(role, pdfs, progress)
+        stats = commit_documents(role, split_docs, progress)
+
+        response = (
+            f"✅ Embeddings updated for role: {role} "
+            f"({len(pdfs)} files, {len(split_docs)} chunks, {stats.embedded} embedded, "
+            f"{stats.cached} from cache, {stats.chunks_per_second:.1f} chunks/s)"
+        )
+        print(response)
+        return response
+
+    except Exception as e:
+        INGEST_FAILURES.inc(kind="bulk")
+        error_msg = f"❌ Bulk ingestion failed: {str(e)}"
+        print(error_msg)
+        raise ValueError(error_msg)
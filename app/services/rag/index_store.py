@@ -0,0 +1,280 @@
+"""
+index_store.py
+--------------
+Process-wide holders for the FAISS vector stores used by the RAG tool.
+
+The store is physically partitioned: every category (engineering, hr, finance,
+marketing, general and any role created through /roles/) has its own FAISS
+index under faiss_index/<category>/, stored as a base segment plus append-only
+delta segments (see segments.py). Each segment is deserialized once and kept
+in memory. Writers bump a version counter next to the partition after every
+new segment or merge, and readers reload only when that counter moves,
+reading just the segments they have not loaded yet.
+"""
+
+import heapq
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from core.metrics import rag_stage
+from services.rag.lexical import PartitionBM25
+from services.rag.segments import (
+    MANIFEST_FILE, VERSION_FILE, read_index_version,
+    append_segment, load_segmented_store
+)
+
+# Where a pre-partitioning shared index is moved once it has been split
+LEGACY_DIR = "_legacy"
+
+# How many times a reader retries when a writer publishes mid-load
+MAX_LOAD_ATTEMPTS = 3
+
+
+class FaissIndexHolder:
+    """
+    Keeps one loaded view of a partition's segments per process and swaps in
+    a new one when the published version changes.
+    """
+
+    def __init__(self, index_path, embedding_model, mmap=False, ann=None):
+        self.index_path = Path(index_path)
+        self.embedding_model = embedding_model
+        self.mmap = mmap
+        self.ann = ann
+        self._lock = threading.Lock()
+        # (version, store) is replaced as a single reference so readers
+        # always get a matching pair
+        self._current = (None, None)
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    def get(self):
+        """Return the current vector store, reloading it if a new version was published"""
+        loaded_version, store = self._current
+        version = read_index_version(self.index_path)
+
+        if version is None:
+            return None
+        if store is not None and version == loaded_version:
+            return store
+
+        with self._lock:
+            # Another thread may have reloaded while we waited
+            loaded_version, store = self._current
+            if store is not None and version == loaded_version:
+                return store
+            return self._reload()
+
+    def _reload(self):
+        last_error = None
+
+        for _ in range(MAX_LOAD_ATTEMPTS):
+            version = read_index_version(self.index_path)
+            if version is None:
+                return None
+            try:
+                # Segments already in memory are reused: only new deltas are read
+                with rag_stage("index_load"):
+                    store = load_segmented_store(
+                        self.index_path, self.embedding_model, previous=self._current[1], mmap=self.mmap, ann=self.ann
+                    )
+            except Exception as e:
+                # Most likely a merge retired a segment while we were reading
+                last_error = e
+                time.sleep(0.05)
+                continue
+
+            # A writer published while we were reading: load again
+            if read_index_version(self.index_path) != version:
+                continue
+
+            self._current = (version, store)
+            print(f"📦 Loaded FAISS index version {version} ({len(store.segments)} segments)")
+            return store
+
+        if self._current[1] is not None:
+            print(f"⚠️ Could not reload FAISS index, serving version {self._current[0]}: {last_error}")
+            return self._current[1]
+
+        if last_error:
+            raise last_error
+        return None
+
+    def invalidate(self):
+        """Drop the cached store so the next get() reloads from disk"""
+        with self._lock:
+            self._current = (None, None)
+
+
+def partition_name(category):
+    """Normalize a category/role name into a safe directory name"""
+    name = re.sub(r"[^a-z0-9_-]+", "_", str(category).strip().lower())
+    return name.strip("_") or "default"
+
+
+class PartitionedIndex:
+    """
+    One FaissIndexHolder per category partition. Queries only touch the
+    partitions a role may read, so no metadata post-filtering is needed.
+    """
+
+    def __init__(self, root_path, embedding_model, mmap=False, ann=None):
+        self.root_path = Path(root_path)
+        self.embedding_model = embedding_model
+        self.mmap = mmap
+        self.ann = ann
+        self._lock = threading.Lock()
+        self._holders = {}
+        self._watcher = None
+
+    def partition_path(self, category):
+        return self.root_path / partition_name(category)
+
+    def holder(self, category):
+        name = partition_name(category)
+        holder = self._holders.get(name)
+        if holder is None:
+            with self._lock:
+                holder = self._holders.get(name)
+                if holder is None:
+                    holder = FaissIndexHolder(self.root_path / name, self.embedding_model, self.mmap, self.ann)
+                    self._holders[name] = holder
+        return holder
+
+    def get(self, category):
+        return self.holder(category).get()
+
+    def published_version(self, category):
+        """Version on disk, which may be newer than the one loaded in memory"""
+        return read_index_version(self.partition_path(category))
+
+    def categories(self):
+        """Categories that currently have a published partition on disk"""
+        if not self.root_path.exists():
+            return []
+        return sorted(
+            path.name for path in self.root_path.iterdir()
+            if path.is_dir() and ((path / MANIFEST_FILE).exists() or (path / "index.faiss").exists())
+        )
+
+    def refresh(self):
+        """Load every partition whose published version differs from the one in memory"""
+        for category in self.categories():
+            holder = self.holder(category)
+            if holder.version != read_index_version(holder.index_path):
+                try:
+                    holder.get()
+                except Exception as e:
+                    print(f"⚠️ Could not load partition {category}: {e}")
+
+    def start_watcher(self, interval_seconds):
+        """
+        Warm every partition now and reload published versions from a
+        background thread, so requests never wait on a load. Each uvicorn
+        worker runs its own watcher and picks up a new version within
+        interval_seconds of the writer publishing it.
+        """
+        if self._watcher is not None or interval_seconds <= 0:
+            return
+
+        def watch():
+            while True:
+                self.refresh()
+                time.sleep(interval_seconds)
+
+        self._watcher = threading.Thread(target=watch, name="faiss-index-watcher", daemon=True)
+        self._watcher.start()
+
+    def search_by_vector(self, embedding, categories, k):
+        """
+        Search each allowed partition for its own top-k and merge by distance.
+        Every partition returns up to k hits, so a small department is never
+        crowded out by a large one.
+        """
+        results = []
+        for category in dict.fromkeys(partition_name(c) for c in categories):
+            store = self.get(category)
+            if store is None:
+                continue
+            results.extend(store.similarity_search_with_score_by_vector(embedding, k=k))
+
+        # FAISS returns L2 distances: lower is closer
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+
+    def lexical_search(self, query, categories, k):
+        """
+        BM25 search over the allowed partitions as one corpus (higher is better).
+        Per-partition idf and document lengths would make scores of a small
+        department incomparable with those of a large one.
+        """
+        partitions = []
+        for category in dict.fromkeys(partition_name(c) for c in categories):
+            store = self.get(category)
+            if store is not None:
+                partitions.append(store.lexical)
+        if not partitions:
+            return []
+        return PartitionBM25.merged(partitions).search(query, k)
+
+    def vectors_for(self, docs):
+        """Stored vectors of retrieved chunks as one array, or None if any is missing"""
+        vectors = []
+        for doc in docs:
+            store = self.get(doc.metadata.get("category", "general"))
+            vector = store.vector_of(doc) if store is not None else None
+            if vector is None:
+                return None
+            vectors.append(vector)
+        return np.vstack(vectors) if vectors else None
+
+
+def split_legacy_index(root_path, embedding_model, build_store=None):
+    """
+    Split a shared index written before partitioning (faiss_index/index.faiss)
+    into per-category partitions. Stored vectors are reused, so no embedding
+    calls are made. The old files are kept under faiss_index/_legacy/.
+    """
+    root = Path(root_path)
+    if not (root / "index.faiss").exists():
+        return False
+
+    # mkdir is atomic: only one worker gets to migrate
+    try:
+        os.makedirs(root / LEGACY_DIR)
+    except FileExistsError:
+        return False
+
+    print("🔀 Splitting shared FAISS index into category partitions...")
+    store = FAISS.load_local(root, embedding_model, allow_dangerous_deserialization=True)
+
+    grouped = {}
+    for position, doc_id in store.index_to_docstore_id.items():
+        doc = store.docstore.search(doc_id)
+        vector = store.index.reconstruct(int(position))
+        category = partition_name(doc.metadata.get("category", "general"))
+        grouped.setdefault(category, []).append((doc_id, doc, vector))
+
+    for category, rows in grouped.items():
+        append_segment(
+            root / category,
+            [(doc.page_content, vector.tolist()) for _, doc, vector in rows],
+            [doc.metadata for _, doc, _ in rows],
+            [doc_id for doc_id, _, _ in rows],
+            embedding_model,
+            build_store=build_store
+        )
+        print(f"✅ Partition {category}: {len(rows)} chunks")
+
+    for name in ("index.faiss", "index.pkl", VERSION_FILE, "role_doc_ids.json"):
+        if (root / name).exists():
+            os.replace(root / name, root / LEGACY_DIR / name)
+
+    return True
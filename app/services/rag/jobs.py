@@ -0,0 +1,153 @@
+"""
+jobs.py
+-------
+Background ingestion jobs.
+
+Uploads are queued and processed by a bounded pool of worker threads, so the
+/embeddings/ingest/ request returns a job id right away. Each job records its
+stage, progress counters (pages parsed, chunks embedded) and per-stage
+timings. Snapshots are also written to disk so any uvicorn worker can answer
+/embeddings/jobs/{id}.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Optional
+
+
+class QueueFullError(Exception):
+    """Raised when the ingest queue already holds max_pending jobs"""
+
+
+@dataclass
+class IngestJob:
+    role: str
+    filename: Optional[str]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    stage: str = "queued"
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    pages_parsed: int = 0
+    chunks_total: int = 0
+    chunks_embedded: int = 0
+    stage_timings: dict = field(default_factory=dict)
+    message: Optional[str] = None
+    error: Optional[str] = None
+    _stage_started: float = field(default_factory=time.time, repr=False)
+
+    def to_dict(self):
+        data = asdict(self)
+        data.pop("_stage_started")
+        return data
+
+
+class IngestJobQueue:
+    """Bounded worker pool that runs ingest functions and tracks their progress"""
+
+    def __init__(self, jobs_dir, max_workers=2, max_pending=20, retention_seconds=3600):
+        self.jobs_dir = Path(jobs_dir)
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def submit(self, role, filename, work, *args, **kwargs):
+        """
+        Queue `work(*args, progress=callback, **kwargs)` and return the job.
+        The callback is called as progress(stage, **counters).
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFullError(f"Ingest queue is full ({self.max_pending} jobs pending)")
+            self._pending += 1
+            job = IngestJob(role=role, filename=filename)
+            self._jobs[job.id] = job
+
+        self._prune()
+        self._persist(job)
+        self._executor.submit(self._run, job, work, args, kwargs)
+        return job
+
+    def get(self, job_id):
+        """Return a job snapshot as a dict, or None if it is unknown"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+
+        # Job may have been queued by another worker process
+        if len(job_id) != 32 or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self.jobs_dir / f"{job_id}.json", "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _run(self, job, work, args, kwargs):
+        job.status = "running"
+        job.started_at = time.time()
+        self._update(job, "starting")
+
+        try:
+            job.message = work(*args, progress=lambda stage, **counters: self._update(job, stage, **counters), **kwargs)
+            job.status = "completed"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            with self._lock:
+                self._pending -= 1
+            job.finished_at = time.time()
+            self._update(job, "done")
+
+    def _update(self, job, stage, **counters):
+        now = time.time()
+        if stage != job.stage:
+            elapsed = now - job._stage_started
+            job.stage_timings[job.stage] = round(job.stage_timings.get(job.stage, 0.0) + elapsed, 4)
+            job.stage = stage
+            job._stage_started = now
+
+        for name, value in counters.items():
+            setattr(job, name, value)
+        self._persist(job)
+
+    def _persist(self, job):
+        try:
+            os.makedirs(self.jobs_dir, exist_ok=True)
+            path = self.jobs_dir / f"{job.id}.json"
+            temp_path = path.with_suffix(".tmp")
+            with open(temp_path, "w") as f:
+                json.dump(job.to_dict(), f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Warning: Could not persist job {job.id}: {e}")
+
+    def _prune(self):
+        """Forget finished jobs older than the retention window"""
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished_at and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+        if self.jobs_dir.exists():
+            for path in self.jobs_dir.glob("*.json"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                except OSError:
+                    pass
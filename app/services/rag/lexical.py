@@ -0,0 +1,171 @@
+"""
+lexical.py
+----------
+BM25 keyword search over FAISS segments, and reciprocal rank fusion.
+
+Embedding search misses questions that hinge on exact tokens: policy codes,
+product names, quarter labels ("Q3 2024") or employee IDs. Every segment
+stores an inverted index (lexical.pkl) next to its index.faiss, built when
+the segment is written. Queries score the live chunks of a partition with
+BM25 and need no embedding call, so a lexical-only mode can answer without
+the embedding API.
+"""
+
+import re
+
+import numpy as np
+
+# Words, numbers and joined codes such as hr-102, fin_2024 or v2.1
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Damping constant of reciprocal rank fusion
+RRF_K = 60
+
+
+def tokenize(text):
+    """Lowercased tokens; joined codes also yield their parts (hr-102 -> hr-102, hr, 102)"""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = re.split(r"[-_./]", token)
+        if len(parts) > 1:
+            tokens.extend(part for part in parts if part)
+    return tokens
+
+
+class SegmentPostings:
+    """Inverted index of one segment: term -> (positions, term frequencies)"""
+
+    def __init__(self, doc_lengths, postings):
+        self.doc_lengths = doc_lengths
+        self.postings = postings
+
+    @classmethod
+    def from_store(cls, store):
+        """Build from a FAISS store, keyed by index position"""
+        doc_lengths = np.zeros(len(store.index_to_docstore_id), dtype=np.int32)
+        term_positions = {}
+
+        for position, doc_id in store.index_to_docstore_id.items():
+            tokens = tokenize(store.docstore.search(doc_id).page_content)
+            doc_lengths[position] = len(tokens)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                term_positions.setdefault(token, []).append((position, count))
+
+        postings = {
+            term: (
+                np.array([p for p, _ in entries], dtype=np.int32),
+                np.array([c for _, c in entries], dtype=np.float32),
+            )
+            for term, entries in term_positions.items()
+        }
+        return cls(doc_lengths, postings)
+
+
+class PartitionBM25:
+    """
+    BM25 over the live chunks of a partition's segments.
+    `segments` is [(store, postings, live_mask or None)]; a mask hides chunks
+    of sources that a later segment replaced or removed.
+    """
+
+    def __init__(self, segments, doc_count=None, total_length=None):
+        self.segments = segments
+        if doc_count is None:
+            live_lengths = [
+                postings.doc_lengths if mask is None else postings.doc_lengths[mask]
+                for _, postings, mask in segments
+            ]
+            doc_count = sum(len(lengths) for lengths in live_lengths)
+            total_length = sum(float(lengths.sum()) for lengths in live_lengths)
+        self.doc_count = doc_count
+        self.total_length = total_length
+        self.avg_length = total_length / doc_count if doc_count else 0.0
+
+    @classmethod
+    def merged(cls, partitions):
+        """
+        One BM25 over several partitions, with idf and average length taken
+        across all of them so their scores are comparable. Reuses each
+        partition's statistics instead of recounting.
+        """
+        return cls(
+            [segment for partition in partitions for segment in partition.segments],
+            doc_count=sum(partition.doc_count for partition in partitions),
+            total_length=sum(partition.total_length for partition in partitions),
+        )
+
+    def search(self, query, k):
+        """Return up to k (doc, score) pairs, best first"""
+        terms = set(tokenize(query))
+        if not terms or not self.doc_count:
+            return []
+
+        # Live postings per term across segments, then document frequency
+        matches = {}
+        for term in terms:
+            for i, (_, postings, mask) in enumerate(self.segments):
+                entry = postings.postings.get(term)
+                if entry is None:
+                    continue
+                positions, tfs = entry
+                if mask is not None:
+                    keep = mask[positions]
+                    positions, tfs = positions[keep], tfs[keep]
+                if len(positions):
+                    matches.setdefault(term, []).append((i, positions, tfs))
+
+        scores = [None] * len(self.segments)
+        for term, entries in matches.items():
+            df = sum(len(positions) for _, positions, _ in entries)
+            idf = np.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+            for i, positions, tfs in entries:
+                postings = self.segments[i][1]
+                if scores[i] is None:
+                    scores[i] = np.zeros(len(postings.doc_lengths), dtype=np.float32)
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * postings.doc_lengths[positions] / self.avg_length)
+                scores[i][positions] += idf * tfs * (BM25_K1 + 1) / (tfs + norm)
+
+        candidates = []
+        for i, segment_scores in enumerate(scores):
+            if segment_scores is None:
+                continue
+            top = np.nonzero(segment_scores)[0]
+            if len(top) > k:
+                top = top[np.argpartition(-segment_scores[top], k - 1)[:k]]
+            store = self.segments[i][0]
+            candidates.extend(
+                (float(segment_scores[position]), store.docstore.search(store.index_to_docstore_id[int(position)]))
+                for position in top
+            )
+
+        candidates.sort(key=lambda pair: pair[0], reverse=True)
+        return [(doc, score) for score, doc in candidates[:k]]
+
+
+def doc_key(doc):
+    return doc.id or (doc.metadata.get("source"), doc.page_content)
+
+
+def reciprocal_rank_fusion(result_lists, k, rrf_k=RRF_K):
+    """
+    Fuse ranked [(doc, score)] lists by sum of 1 / (rrf_k + rank).
+    Scores of different retrievers are not comparable; ranks are.
+    Returns up to k (doc, fused_score) pairs, best first.
+    """
+    fused = {}
+    docs = {}
+    for results in result_lists:
+        for rank, (doc, _) in enumerate(results, start=1):
+            key = doc_key(doc)
+            docs.setdefault(key, doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (rrf_k + rank)
+
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+    return [(docs[key], score) for key, score in ranked]
@@ -0,0 +1,136 @@
+"""
+parsing.py
+----------
+Document parsing and chunking for ingestion.
+
+Kept free of embedding/index imports so it can run in worker processes:
+ingestion parses files in a process pool across all cores.
+"""
+
+import io
+import os
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+
+from langchain_community.document_loaders import UnstructuredMarkdownLoader, CSVLoader, TextLoader, PyPDFLoader
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+
+def split_documents(docs, category, source):
+    """Split loaded documents into chunks tagged with source and category"""
+    splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+    split_docs = splitter.split_documents(docs)
+    for doc in split_docs:
+        doc.metadata = {
+            "source": source,
+            "category": category
+        }
+    return split_docs
+
+
+def parse_pdf(file_bytes, filename, category):
+    """
+    Parse a PDF from bytes and return (pages_parsed, chunks).
+    Runs in a worker process, so it only takes and returns picklable values.
+    """
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
+            temp_file.write(file_bytes)
+            temp_path = temp_file.name
+
+        docs = PyPDFLoader(temp_path).load()
+        if not docs:
+            raise ValueError(f"No content extracted from {filename}")
+
+        return len(docs), split_documents(docs, category, filename or "unknown")
+
+    finally:
+        if temp_path and os.path.exists(temp_path):
+            try:
+                os.unlink(temp_path)
+            except Exception as e:
+                print(f"Warning: Could not delete temporary file: {e}")
+
+
+# File types picked up from the resources/data department folders
+CORPUS_EXTENSIONS = (".md", ".csv")
+
+
+def parse_corpus_file(path, category, source):
+    """
+    Load a markdown or CSV file from the department corpus and return its chunks.
+    Runs in a worker process, so it only takes and returns picklable values.
+    """
+    path = str(path)
+    if path.endswith(".md"):
+        try:
+            docs = UnstructuredMarkdownLoader(path, mode="elements", strategy="fast").load()
+        except Exception:
+            docs = TextLoader(path).load()
+    elif path.endswith(".csv"):
+        docs = CSVLoader(path).load()
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+    return split_documents(docs, category, source)
+
+
+def expand_uploads(files, max_total_bytes):
+    """
+    Turn uploaded (filename, bytes) pairs into PDF (filename, bytes) pairs,
+    extracting PDFs from zip archives. Stops at max_total_bytes of PDF data.
+    """
+    pdfs = []
+    total = 0
+
+    def add(name, data):
+        nonlocal total
+        total += len(data)
+        if total > max_total_bytes:
+            raise ValueError(f"Upload exceeds {max_total_bytes} bytes of PDF data")
+        pdfs.append((name, data))
+
+    for filename, data in files:
+        name = filename or "unknown"
+        if name.lower().endswith(".zip"):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    member_name = member.filename
+                    if member.is_dir() or not member_name.lower().endswith(".pdf"):
+                        continue
+                    if member_name.startswith("__MACOSX/") or os.path.basename(member_name).startswith("."):
+                        continue
+                    if total + member.file_size > max_total_bytes:
+                        raise ValueError(f"Upload exceeds {max_total_bytes} bytes of PDF data")
+                    add(member_name, archive.read(member))
+        elif name.lower().endswith(".pdf"):
+            add(name, data)
+        else:
+            raise ValueError(f"Unsupported file type: {name}")
+
+    return pdfs
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool(max_workers=None):
+    """Process pool shared by all ingestion jobs, created on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                # spawn: forking a process that runs threads is unsafe
+                _pool = ProcessPoolExecutor(
+                    max_workers=max_workers or os.cpu_count(),
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _pool
@@ -0,0 +1,57 @@
+"""
+rerank.py
+---------
+Maximal marginal relevance (MMR) re-ranking of retrieved chunks.
+
+Overlapping chunks of the same section often rank next to each other and
+fill the few context slots with near-duplicates. MMR picks, one at a time,
+the candidate that is relevant to the query but least similar to what was
+already picked. Vectors come from the index, so nothing is re-embedded, and
+all similarities are computed with one matrix product.
+"""
+
+import numpy as np
+
+
+def _unit_rows(vectors):
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def rank_relevance(count):
+    """Relevance from rank alone, for retrievers without a query vector (BM25)"""
+    return np.linspace(1.0, 0.0, count, endpoint=False, dtype=np.float32)
+
+
+def cosine_relevance(query_vector, vectors):
+    return _unit_rows(vectors) @ _unit_rows(np.asarray(query_vector, dtype=np.float32))
+
+
+def mmr_select(relevance, vectors, k, lambda_mult=0.5):
+    """
+    Return the indices of k candidates chosen by MMR, in pick order.
+    lambda_mult=1 ranks by relevance only, 0 maximizes diversity only.
+    """
+    count = len(relevance)
+    if count <= k:
+        return list(np.argsort(-relevance))
+
+    unit = _unit_rows(np.asarray(vectors, dtype=np.float32))
+    similarity = unit @ unit.T
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    # Highest similarity of every candidate to anything already selected
+    max_similarity = similarity[first].copy()
+    available = np.ones(count, dtype=bool)
+    available[first] = False
+
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        pick = int(np.argmax(scores))
+        selected.append(pick)
+        available[pick] = False
+        np.maximum(max_similarity, similarity[pick], out=max_similarity)
+
+    return selected
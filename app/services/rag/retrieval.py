@@ -0,0 +1,99 @@
+"""
+retrieval.py
+------------
+The retrieval path behind rag_tool: vector / hybrid / lexical search over
+the partitions a role may read (services.rag.role_acl), and MMR diversification.
+
+Kept free of the chat model so offline benchmarks can run the exact same
+path with a local embedding function.
+"""
+
+import asyncio
+
+from services.rag.lexical import reciprocal_rank_fusion
+from services.rag.rerank import mmr_select, cosine_relevance, rank_relevance
+from services.rag.role_acl import categories_for_role
+from core.config import MMR_LAMBDA, MMR_FETCH_K, MMR_ROLE_SETTINGS
+from core.metrics import rag_stage
+
+RETRIEVAL_MODES = ("vector", "hybrid", "lexical")
+
+
+def mmr_settings_for_role(user_role):
+    """Return the (lambda, candidate pool size) used to diversify a role's context"""
+    settings = MMR_ROLE_SETTINGS.get(user_role, {})
+    return settings.get("lambda", MMR_LAMBDA), settings.get("fetch_k", MMR_FETCH_K)
+
+
+async def _timed(stage, awaitable):
+    with rag_stage(stage):
+        return await awaitable
+
+
+class Retriever:
+    def __init__(self, index, embeddings, mode="hybrid", candidate_multiplier=2, mmr_enabled=True):
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode {mode!r}, expected one of {RETRIEVAL_MODES}")
+        self.index = index
+        self.embeddings = embeddings
+        self.mode = mode
+        self.candidate_multiplier = candidate_multiplier
+        self.mmr_enabled = mmr_enabled
+
+    async def search(self, query, user_role):
+        """Return the (doc, score) pairs rag_tool puts in the context for this role"""
+        categories, k = categories_for_role(user_role)
+        if not self.mmr_enabled:
+            results, _ = await self.retrieve(query, categories, k)
+            return results
+
+        # Over-fetch, then drop near-duplicate (overlapping) chunks
+        lambda_mult, fetch_k = mmr_settings_for_role(user_role)
+        results, query_embedding = await self.retrieve(query, categories, max(k, fetch_k))
+        return await _timed("mmr", asyncio.to_thread(self.diversify, results, query_embedding, k, lambda_mult))
+
+    async def retrieve(self, query, categories, k):
+        """
+        Search only the given partitions, as configured by the retrieval mode.
+        Returns (results, query_embedding); the embedding is None in lexical mode.
+        Index search (and any index reload) runs off the event loop.
+        """
+        if self.mode == "lexical":
+            results = await _timed("lexical_search", asyncio.to_thread(self.index.lexical_search, query, categories, k))
+            return results, None
+
+        query_embedding = await _timed("query_embedding", self.embeddings.aembed_query(query))
+        if self.mode == "vector":
+            results = await _timed(
+                "vector_search", asyncio.to_thread(self.index.search_by_vector, query_embedding, categories, k)
+            )
+            return results, query_embedding
+
+        # Exact tokens (policy codes, IDs, "Q3 2024") are found by BM25,
+        # paraphrases by the embeddings; ranks are fused, scores are not comparable
+        candidates = k * self.candidate_multiplier
+        vector_results, lexical_results = await asyncio.gather(
+            _timed("vector_search", asyncio.to_thread(self.index.search_by_vector, query_embedding, categories, candidates)),
+            _timed("lexical_search", asyncio.to_thread(self.index.lexical_search, query, categories, candidates)),
+        )
+        return reciprocal_rank_fusion([vector_results, lexical_results], k), query_embedding
+
+    def diversify(self, results, query_embedding, k, lambda_mult):
+        """
+        Keep k of the ranked candidates with MMR, using the vectors stored in the
+        index. Falls back to the top k if a candidate's vector is unavailable.
+        Stored vectors only drive the diversity term: relevance is cosine to the
+        query in vector mode, and the fused (or BM25) rank otherwise, so exact
+        token hits that only the lexical leg found are not reranked out.
+        """
+        if len(results) <= k:
+            return results
+        vectors = self.index.vectors_for([doc for doc, _ in results])
+        if vectors is None:
+            return results[:k]
+
+        if self.mode == "vector":
+            relevance = cosine_relevance(query_embedding, vectors)
+        else:
+            relevance = rank_relevance(len(results))
+        return [results[i] for i in mmr_select(relevance, vectors, k, lambda_mult)]
@@ -0,0 +1,84 @@
+"""
+role_acl.py
+-----------
+Which category partitions each role may retrieve from.
+
+The role_categories table is the source of truth. It is compiled into a
+plain dict that retrieval reads per request without touching the database;
+a refresh builds a new dict and swaps it in, so readers never see a partial
+map. Roles missing from the map read only their own category.
+"""
+
+import threading
+import time
+
+# Seeded into role_categories for the built-in roles (db/init_db.py), and
+# used until the table has been loaded (offline benchmarks never load it)
+DEFAULT_ROLE_CATEGORIES = {
+    "c-levelexecutives": ["engineering", "hr", "finance", "marketing", "general"],
+    "employee": ["general"],
+    "engineering": ["engineering"],
+    "finance": ["finance"],
+    "hr": ["hr"],
+    "marketing": ["marketing"],
+}
+
+# Chunks put in the context; roles reading many partitions get more
+ROLE_TOP_K = {"c-levelexecutives": 5}
+DEFAULT_TOP_K = 3
+
+
+class RoleACL:
+    def __init__(self, mapping=None):
+        self._categories = self._compile(DEFAULT_ROLE_CATEGORIES if mapping is None else mapping)
+        self._refresher = None
+
+    @staticmethod
+    def _compile(mapping):
+        # A role without grants (e.g. a database created before the table
+        # existed) keeps its built-in categories, or its own category
+        compiled = {}
+        for role, categories in mapping.items():
+            role = role.lower()
+            categories = categories or DEFAULT_ROLE_CATEGORIES.get(role, [role])
+            compiled[role] = tuple(dict.fromkeys(category.lower() for category in categories))
+        return compiled
+
+    def replace(self, mapping):
+        """Swap in a new {role: categories} map"""
+        self._categories = self._compile(mapping)
+
+    def categories(self, user_role):
+        return self._categories.get(user_role, (user_role,))
+
+    def top_k(self, user_role):
+        return ROLE_TOP_K.get(user_role, DEFAULT_TOP_K)
+
+    def snapshot(self):
+        return {role: list(categories) for role, categories in self._categories.items()}
+
+    def start_refresher(self, load, interval_seconds):
+        """
+        Call load() (which replaces the map) every interval_seconds from a
+        background thread. Each uvicorn worker runs its own, so a role change
+        handled by another worker is seen within interval_seconds.
+        """
+        if self._refresher is not None or interval_seconds <= 0:
+            return
+
+        def refresh():
+            while True:
+                time.sleep(interval_seconds)
+                load()
+
+        self._refresher = threading.Thread(target=refresh, name="role-acl-refresher", daemon=True)
+        self._refresher.start()
+
+
+# Process-wide map, refreshed by db.crud.refresh_role_acl
+role_acl = RoleACL()
+
+
+def categories_for_role(user_role):
+    """Return the (categories, k) a role may retrieve from"""
+    return list(role_acl.categories(user_role)), role_acl.top_k(user_role)
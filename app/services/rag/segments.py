@@ -0,0 +1,521 @@
+"""
+segments.py
+-----------
+Append-only segmented on-disk layout of one FAISS partition.
+
+    faiss_index/<category>/
+        segments.json        ordered segment list: base first, then deltas
+        version.json         version counter readers watch
+        seg-000001/          base segment (index.faiss, index.pkl, lexical.pkl, sources.pkl)
+        seg-000002/          delta segment with only the chunks of one ingest
+        ...
+
+An ingest writes one small delta segment plus the manifest, so its I/O
+depends only on the new data. A segment's tombstones name the sources it
+removed or replaced; they hide those sources in every earlier segment.
+Queries search base + deltas, and a background merge folds the deltas into
+a new base once there are too many of them.
+"""
+
+import heapq
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.faiss import dependable_faiss_import
+
+from services.rag.lexical import PartitionBM25, SegmentPostings
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+VERSION_FILE = "version.json"
+MANIFEST_FILE = "segments.json"
+LOCK_FILE = ".lock"
+MERGE_LOCK_FILE = ".merge.lock"
+
+# Exact vectors kept next to lossy (PQ) segments for merges
+RAW_VECTORS_FILE = "vectors.npy"
+
+# BM25 inverted index of the segment's chunks
+LEXICAL_FILE = "lexical.pkl"
+SOURCES_FILE = "sources.pkl"
+
+# Merged-away segments are kept this long so readers mid-load can finish
+RETIRED_GRACE_SECONDS = 300
+
+
+# -------------------------------
+# Versioning
+# -------------------------------
+def read_index_version(index_path):
+    """Return the published version counter, or None if nothing was published yet"""
+    version_file = Path(index_path) / VERSION_FILE
+    try:
+        with open(version_file, "r") as f:
+            return json.load(f).get("version")
+    except FileNotFoundError:
+        # Index written before versioning existed: fall back to its mtime
+        index_file = Path(index_path) / "index.faiss"
+        if index_file.exists():
+            return f"mtime-{index_file.stat().st_mtime_ns}"
+        return None
+    except (OSError, ValueError):
+        return None
+
+
+def publish_index_version(index_path):
+    """
+    Bump the version counter after the index files are fully written.
+    The manifest is replaced atomically so readers never see a partial file.
+    """
+    current = read_index_version(index_path)
+    version = current + 1 if isinstance(current, int) else 1
+    _write_json(Path(index_path) / VERSION_FILE, {"version": version, "published_at": time.time()})
+    return version
+
+
+def _write_json(path, data):
+    os.makedirs(path.parent, exist_ok=True)
+    temp_file = path.with_suffix(".tmp")
+    with open(temp_file, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(temp_file, path)
+
+
+# -------------------------------
+# Manifest & locking
+# -------------------------------
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path, name):
+    key = (str(Path(path).resolve()), name)
+    with _thread_locks_guard:
+        return _thread_locks.setdefault(key, threading.Lock())
+
+
+@contextmanager
+def partition_lock(path, name=LOCK_FILE, blocking=True):
+    """
+    Exclusive lock on a partition across threads and processes.
+    Yields False instead of waiting when blocking=False and the lock is taken.
+    """
+    path = Path(path)
+    os.makedirs(path, exist_ok=True)
+    thread_lock = _thread_lock(path, name)
+    if not thread_lock.acquire(blocking):
+        yield False
+        return
+
+    try:
+        with open(path / name, "a") as f:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield False
+                    return
+            try:
+                yield True
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+    finally:
+        thread_lock.release()
+
+
+def read_manifest(path):
+    try:
+        with open(Path(path) / MANIFEST_FILE, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(path, manifest):
+    _write_json(Path(path) / MANIFEST_FILE, manifest)
+
+
+def segment_name(number):
+    return f"seg-{number:06d}"
+
+
+def _empty_manifest():
+    return {"segments": [], "next_segment": 1, "retired": []}
+
+
+def _load_or_adopt_manifest(path):
+    """
+    Return the partition manifest. A partition saved as a single index
+    before segments existed becomes the base segment (files are moved, not copied).
+    """
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest
+
+    manifest = _empty_manifest()
+    if (path / "index.faiss").exists():
+        name = segment_name(0)
+        os.makedirs(path / name, exist_ok=True)
+        for file_name in ("index.faiss", "index.pkl"):
+            os.replace(path / file_name, path / name / file_name)
+        manifest["segments"].append({"name": name, "tombstones": [], "count": None})
+    return manifest
+
+
+# -------------------------------
+# Writing
+# -------------------------------
+def flat_store(text_embeddings, embedding, metadatas, ids):
+    """Default segment builder: LangChain's exact flat index"""
+    return FAISS.from_embeddings(
+        text_embeddings=text_embeddings,
+        embedding=embedding,
+        metadatas=metadatas,
+        ids=ids
+    )
+
+
+def source_positions(store):
+    """{source: index positions of its chunks}, so tombstones map to positions without a scan"""
+    positions = {}
+    for position, doc_id in store.index_to_docstore_id.items():
+        positions.setdefault(store.docstore.search(doc_id).metadata.get("source"), []).append(position)
+    return {source: np.asarray(found, dtype=np.int64) for source, found in positions.items()}
+
+
+def save_segment(store, path):
+    store.save_local(path)
+    with open(Path(path) / LEXICAL_FILE, "wb") as f:
+        pickle.dump(SegmentPostings.from_store(store), f)
+    with open(Path(path) / SOURCES_FILE, "wb") as f:
+        pickle.dump(source_positions(store), f)
+    raw_vectors = getattr(store, "raw_vectors", None)
+    if raw_vectors is not None:
+        np.save(Path(path) / RAW_VECTORS_FILE, raw_vectors)
+
+
+def append_segment(path, text_embeddings, metadatas, ids, embedding, removed_sources=(), build_store=None):
+    """
+    Write the given chunks as a new delta segment and publish it.
+    `removed_sources` are hidden in every earlier segment (re-uploaded or deleted files).
+    `build_store(text_embeddings, embedding, metadatas, ids)` builds the segment's store.
+    Returns the number of segments in the partition.
+    """
+    path = Path(path)
+    removed_sources = sorted(set(removed_sources))
+    if not text_embeddings and not removed_sources:
+        return None
+
+    with partition_lock(path):
+        manifest = _load_or_adopt_manifest(path)
+        name = segment_name(manifest["next_segment"])
+        manifest["next_segment"] += 1
+
+        if text_embeddings:
+            store = (build_store or flat_store)(text_embeddings, embedding, metadatas, ids)
+            save_segment(store, path / name)
+
+        manifest["segments"].append({
+            "name": name,
+            "tombstones": removed_sources,
+            "count": len(text_embeddings),
+        })
+        write_manifest(path, manifest)
+        publish_index_version(path)
+
+    return len(manifest["segments"])
+
+
+def merge_segments(path, embedding, build_store=None, mmap=False):
+    """
+    Fold every segment into a new base holding only live chunks.
+    Stored vectors are reused, so no embedding calls are made. Segments
+    appended while the merge runs stay as deltas on top of the new base.
+    `build_store(text_embeddings, embedding, metadatas, ids)` builds the new base.
+    """
+    path = Path(path)
+    build_store = build_store or flat_store
+
+    with partition_lock(path, MERGE_LOCK_FILE, blocking=False) as acquired:
+        if not acquired:
+            return False
+
+        # 1️⃣ Snapshot the segments to merge and reserve the new base's name
+        with partition_lock(path):
+            manifest = read_manifest(path)
+            if not manifest or len(manifest["segments"]) < 2:
+                return False
+            snapshot = list(manifest["segments"])
+            name = segment_name(manifest["next_segment"])
+            manifest["next_segment"] += 1
+            write_manifest(path, manifest)
+
+        # 2️⃣ Collect live chunks and build the new base (no locks held)
+        start = time.perf_counter()
+        view = load_segmented_store(path, embedding, segments=snapshot, mmap=mmap)
+        text_embeddings, metadatas, ids = [], [], []
+        for doc_id, doc, vector in view.iter_live():
+            text_embeddings.append((doc.page_content, vector.tolist()))
+            metadatas.append(doc.metadata)
+            ids.append(doc_id)
+
+        if text_embeddings:
+            save_segment(build_store(text_embeddings, embedding, metadatas, ids), path / name)
+
+        # 3️⃣ Swap the merged segments for the new base
+        with partition_lock(path):
+            manifest = read_manifest(path)
+            merged = {entry["name"] for entry in snapshot}
+            remaining = [entry for entry in manifest["segments"] if entry["name"] not in merged]
+            base = [{"name": name, "tombstones": [], "count": len(text_embeddings)}] if text_embeddings else []
+            manifest["segments"] = base + remaining
+            manifest.setdefault("retired", []).extend(
+                {"name": entry["name"], "at": time.time()} for entry in snapshot
+            )
+            _remove_retired(path, manifest)
+            write_manifest(path, manifest)
+            publish_index_version(path)
+
+    print(
+        f"🧹 Merged {len(snapshot)} segments of {path.name} into {name} "
+        f"({len(text_embeddings)} live chunks, {time.perf_counter() - start:.2f}s)"
+    )
+    return True
+
+
+def _remove_retired(path, manifest):
+    cutoff = time.time() - RETIRED_GRACE_SECONDS
+    keep = []
+    for entry in manifest.get("retired", []):
+        if entry["at"] < cutoff:
+            shutil.rmtree(path / entry["name"], ignore_errors=True)
+        else:
+            keep.append(entry)
+    manifest["retired"] = keep
+
+
+_merge_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="segment-merge")
+
+
+def schedule_merge(path, embedding, max_deltas, build_store=None, mmap=False):
+    """Merge in the background once the partition has more than max_deltas deltas"""
+    manifest = read_manifest(path)
+    if manifest and len(manifest["segments"]) - 1 >= max_deltas:
+        future = _merge_executor.submit(merge_segments, path, embedding, build_store, mmap)
+        future.add_done_callback(lambda f: _report_merge_error(path, f))
+
+
+def _report_merge_error(path, future):
+    error = future.exception()
+    if error is not None:
+        print(f"❌ Segment merge failed for {path}: {error}")
+
+
+# -------------------------------
+# Reading
+# -------------------------------
+def load_faiss_segment(path, embedding, mmap=False, ann=None):
+    """
+    Load one saved FAISS store. With mmap=True the vectors are memory-mapped
+    read-only instead of copied into the heap, so every worker process on the
+    host shares the same page-cache pages. Segments are never modified after
+    they are written, which makes a read-only mapping safe.
+    `ann` (an AnnConfig) applies search parameters such as nprobe/efSearch.
+    """
+    path = Path(path)
+    if mmap:
+        store = _mmap_faiss_store(path, embedding)
+    else:
+        store = FAISS.load_local(path, embedding, allow_dangerous_deserialization=True)
+
+    if ann is not None:
+        ann.tune(store.index)
+    if (path / RAW_VECTORS_FILE).exists():
+        store.raw_vectors = np.load(path / RAW_VECTORS_FILE, mmap_mode="r")
+
+    if (path / LEXICAL_FILE).exists():
+        with open(path / LEXICAL_FILE, "rb") as f:
+            store.lexical = pickle.load(f)
+    else:
+        # Segment written before keyword search existed
+        store.lexical = SegmentPostings.from_store(store)
+
+    if (path / SOURCES_FILE).exists():
+        with open(path / SOURCES_FILE, "rb") as f:
+            store.source_positions = pickle.load(f)
+    else:
+        # Older segment: built once per load, not once per published version
+        store.source_positions = source_positions(store)
+    return store
+
+
+def _mmap_faiss_store(path, embedding):
+    faiss = dependable_faiss_import()
+    # IO_FLAG_MMAP_IFC (faiss >= 1.8) maps flat and HNSW storage codes but is
+    # rejected for IVF-Flat/IVF-PQ, whose inverted lists IO_FLAG_MMAP maps
+    flag_sets = [faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY]
+    if hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        flag_sets.insert(0, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+
+    index = None
+    for flags in flag_sets:
+        try:
+            index = faiss.read_index(str(path / "index.faiss"), flags)
+            break
+        except RuntimeError as e:
+            error = e
+    if index is None:
+        print(f"⚠️ Could not memory-map {path}, loading into memory: {error}")
+        index = faiss.read_index(str(path / "index.faiss"))
+
+    with open(path / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(embedding, index, docstore, index_to_docstore_id)
+
+
+class SegmentedStore:
+    """Read-only view over the live chunks of a partition's segments"""
+
+    def __init__(self, segments):
+        # [(name, FAISS store, hidden sources, live mask or None)] oldest first
+        self.segments = segments
+        self.stores = {name: store for name, store, _, _ in segments}
+        self.masks = {name: (hidden, mask) for name, _, hidden, mask in segments}
+        self.lexical = PartitionBM25([(store, store.lexical, mask) for _, store, _, mask in segments])
+
+    @staticmethod
+    def _hidden_count(store, mask):
+        return 0 if mask is None else store.index.ntotal - int(mask.sum())
+
+    @property
+    def ntotal(self):
+        return sum(store.index.ntotal - self._hidden_count(store, mask) for _, store, _, mask in self.segments)
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4):
+        results = []
+        for _, store, hidden, mask in self.segments:
+            hidden_count = self._hidden_count(store, mask)
+            if hidden_count:
+                # Over-fetch by the number of hidden chunks so k live ones survive the filter
+                results.extend(store.similarity_search_with_score_by_vector(
+                    embedding,
+                    k=k,
+                    filter=lambda metadata, hidden=hidden: metadata.get("source") not in hidden,
+                    fetch_k=k + hidden_count
+                ))
+            else:
+                results.extend(store.similarity_search_with_score_by_vector(embedding, k=k))
+
+        # FAISS returns L2 distances: lower is closer
+        return heapq.nsmallest(k, results, key=lambda pair: pair[1])
+
+    def lexical_search(self, query, k=4):
+        """BM25 keyword search; returns (doc, score) pairs, higher is better"""
+        return self.lexical.search(query, k)
+
+    def vector_of(self, doc):
+        """Stored vector of a chunk returned by this view, or None if it is unknown"""
+        doc_id = getattr(doc, "id", None)
+        if doc_id is None:
+            return None
+        # Newest first: a re-uploaded source reuses the ids of its hidden chunks
+        for _, store, _, _ in reversed(self.segments):
+            positions = getattr(store, "docstore_positions", None)
+            if positions is None:
+                positions = {value: key for key, value in store.index_to_docstore_id.items()}
+                store.docstore_positions = positions
+            position = positions.get(doc_id)
+            if position is None:
+                continue
+            raw_vectors = getattr(store, "raw_vectors", None)
+            if raw_vectors is not None:
+                return np.asarray(raw_vectors[position])
+            return store.index.reconstruct(int(position))
+        return None
+
+    def iter_live(self):
+        """Yield (doc_id, doc, vector) for every chunk not hidden by a later segment"""
+        for _, store, _, mask in self.segments:
+            # PQ segments keep exact vectors on disk; reconstructing would be lossy
+            raw_vectors = getattr(store, "raw_vectors", None)
+            for position, doc_id in store.index_to_docstore_id.items():
+                if mask is not None and not mask[position]:
+                    continue
+                doc = store.docstore.search(doc_id)
+                if raw_vectors is not None:
+                    yield doc_id, doc, np.asarray(raw_vectors[position])
+                else:
+                    yield doc_id, doc, store.index.reconstruct(int(position))
+
+
+def _live_mask(store, hidden):
+    """
+    Boolean mask over index positions of chunks not hidden by later segments,
+    or None if none are. Costs the hidden chunks, not the segment size.
+    """
+    if not hidden:
+        return None
+    sources = store.source_positions
+    if len(hidden) < len(sources):
+        hit = [sources[source] for source in hidden if source in sources]
+    else:
+        hit = [positions for source, positions in sources.items() if source in hidden]
+    if not hit:
+        return None
+    mask = np.ones(len(store.index_to_docstore_id), dtype=bool)
+    mask[np.concatenate(hit)] = False
+    return mask
+
+
+def load_segmented_store(path, embedding, previous=None, segments=None, mmap=False, ann=None):
+    """
+    Load the partition's live view. Segments already loaded in `previous`
+    are reused, so a new version only reads the new delta segments.
+    """
+    path = Path(path)
+    if segments is None:
+        manifest = read_manifest(path)
+        if manifest is None:
+            # Partition saved as a single index before segments existed
+            if not (path / "index.faiss").exists():
+                return None
+            store = load_faiss_segment(path, embedding, mmap, ann)
+            return SegmentedStore([("", store, frozenset(), None)])
+        segments = manifest["segments"]
+
+    loaded = previous.stores if previous is not None else {}
+    masks = previous.masks if previous is not None else {}
+    views = []
+    hidden = set()
+
+    # Newest first: a segment is hidden by the tombstones of every later one
+    for entry in reversed(segments):
+        if entry.get("count") != 0:
+            name = entry["name"]
+            store = loaded.get(name)
+            if store is None:
+                store = load_faiss_segment(path / name, embedding, mmap, ann)
+            segment_hidden = frozenset(hidden)
+            # Unchanged tombstones above an already loaded segment: keep its mask
+            previous_hidden, mask = masks.get(name, (None, None))
+            if previous_hidden != segment_hidden:
+                mask = _live_mask(store, segment_hidden)
+            views.append((name, store, segment_hidden, mask))
+        hidden.update(entry.get("tombstones", []))
+
+    views.reverse()
+    return SegmentedStore(views)
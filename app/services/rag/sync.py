@@ -0,0 +1,186 @@
+"""
+sync.py
+-------
+Incremental sync of the department corpus (resources/data/<department>/*.md, *.csv)
+into the partitioned FAISS store.
+
+A manifest records the size, mtime and content hash of every synced file.
+Only added, changed or deleted files are re-chunked and re-embedded, so a
+nightly run takes time proportional to the changes, not the corpus.
+
+Usage (from the app/ directory):
+    python -m services.rag.sync
+    python -m services.rag.sync --data-dir ../resources/data --dry-run
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from core.config import CORPUS_DATA_DIR, INGEST_PARSE_PROCESSES
+from services.rag.embeddings import FAISS_PATH, commit_documents
+from services.rag.parsing import CORPUS_EXTENSIONS, parse_corpus_file, get_parse_pool
+
+MANIFEST_FILE = FAISS_PATH / "sync_manifest.json"
+
+
+def load_manifest():
+    if MANIFEST_FILE.exists():
+        with open(MANIFEST_FILE, "r") as f:
+            return json.load(f)
+    return {"files": {}}
+
+
+def save_manifest(manifest):
+    os.makedirs(MANIFEST_FILE.parent, exist_ok=True)
+    temp_file = MANIFEST_FILE.with_suffix(".tmp")
+    with open(temp_file, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_file, MANIFEST_FILE)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def scan_corpus(data_dir, manifest):
+    """
+    Walk the department folders and return {relative_path: entry}.
+    Files whose size and mtime match the manifest reuse the recorded hash.
+    """
+    known = manifest["files"]
+    current = {}
+
+    for department in sorted(os.listdir(data_dir)):
+        dept_path = Path(data_dir) / department
+        if not dept_path.is_dir():
+            continue
+
+        for path in sorted(dept_path.rglob("*")):
+            if not path.is_file() or path.suffix.lower() not in CORPUS_EXTENSIONS:
+                continue
+
+            relative = path.relative_to(data_dir).as_posix()
+            stat = path.stat()
+            previous = known.get(relative)
+
+            if previous and previous["size"] == stat.st_size and previous["mtime_ns"] == stat.st_mtime_ns:
+                sha256 = previous["sha256"]
+            else:
+                sha256 = file_sha256(path)
+
+            current[relative] = {
+                "category": department.lower(),
+                "source": path.relative_to(dept_path).as_posix(),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+            }
+
+    return current
+
+
+def plan_sync(manifest, current):
+    """Return {category: {"added": [...], "changed": [...], "deleted": [...]}} for changed categories"""
+    known = manifest["files"]
+    plan = {}
+
+    def bucket(category):
+        return plan.setdefault(category, {"added": [], "changed": [], "deleted": []})
+
+    for relative, entry in current.items():
+        previous = known.get(relative)
+        if previous is None:
+            bucket(entry["category"])["added"].append(relative)
+        elif previous["sha256"] != entry["sha256"]:
+            bucket(entry["category"])["changed"].append(relative)
+
+    for relative, previous in known.items():
+        if relative not in current:
+            bucket(previous["category"])["deleted"].append(relative)
+
+    return plan
+
+
+def sync_corpus(data_dir, dry_run=False):
+    data_dir = Path(data_dir)
+    manifest = load_manifest()
+    current = scan_corpus(data_dir, manifest)
+    plan = plan_sync(manifest, current)
+
+    unchanged = len(current) - sum(len(c["added"]) + len(c["changed"]) for c in plan.values())
+    print(f"🔍 Scanned {len(current)} files in {data_dir} ({unchanged} unchanged)")
+
+    if not plan:
+        print("✅ Corpus already in sync")
+        return plan
+
+    for category, changes in sorted(plan.items()):
+        print(
+            f"  {category}: {len(changes['added'])} added, "
+            f"{len(changes['changed'])} changed, {len(changes['deleted'])} deleted"
+        )
+    if dry_run:
+        return plan
+
+    pool = get_parse_pool(INGEST_PARSE_PROCESSES)
+
+    for category, changes in sorted(plan.items()):
+        start = time.perf_counter()
+        to_parse = changes["added"] + changes["changed"]
+
+        # Parse changed files across all cores
+        futures = {
+            relative: pool.submit(parse_corpus_file, data_dir / relative, category, current[relative]["source"])
+            for relative in to_parse
+        }
+        split_docs = []
+        failed = []
+        for relative, future in futures.items():
+            try:
+                split_docs.extend(future.result())
+            except Exception as e:
+                print(f"❌ Failed to load {relative}: {e}")
+                failed.append(relative)
+
+        # Deleted files lose their chunks; so do parsed changed files, even
+        # when they now yield none (sources with chunks are replaced anyway)
+        deleted_sources = [manifest["files"][relative]["source"] for relative in changes["deleted"]]
+        removed_sources = set(deleted_sources)
+        for relative in changes["changed"]:
+            if relative not in failed:
+                removed_sources.add(manifest["files"][relative]["source"])
+                removed_sources.add(current[relative]["source"])
+        stats = commit_documents(category, split_docs, removed_sources=removed_sources)
+
+        # Record progress per category so an interrupted run resumes where it stopped
+        for relative in to_parse:
+            if relative not in failed:
+                manifest["files"][relative] = current[relative]
+        for relative in changes["deleted"]:
+            manifest["files"].pop(relative, None)
+        save_manifest(manifest)
+
+        print(
+            f"✅ {category}: {len(split_docs)} chunks from {len(to_parse) - len(failed)} files, "
+            f"{len(deleted_sources)} files removed in {time.perf_counter() - start:.2f}s "
+            f"({stats.embedded} embedded, {stats.cached} from cache)"
+        )
+
+    return plan
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=CORPUS_DATA_DIR, help="Folder with one sub-folder per department")
+    parser.add_argument("--dry-run", action="store_true", help="Only print what would change")
+    args = parser.parse_args()
+
+    sync_corpus(args.data_dir, dry_run=args.dry_run)
@@ -0,0 +1,27 @@
+import base64
+import json
+
+
+def format_sse(event, data):
+    """Format one Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+# Page size when a cursor is passed without a limit
+DEFAULT_PAGE_SIZE = 100
+
+
+def encode_cursor(value):
+    """Opaque pagination cursor for the last key of a page"""
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def decode_cursor(cursor, expected_type):
+    """Key encoded by encode_cursor; raises ValueError if the cursor is malformed"""
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if type(value) is not expected_type:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return value
@@ -0,0 +1,113 @@
+"""
+agent_construction.py
+---------------------
+Measures the per-request overhead removed by building the chat agent once:
+create_agent + invoke on every request (old query()) versus invoking the
+shared agent with the role passed as runtime context.
+
+A fake chat model answers immediately, so the numbers isolate agent
+construction and graph overhead from LLM latency.
+
+Usage (from the repository root):
+    python benchmarks/agent_construction.py --iterations 200
+"""
+
+import argparse
+import itertools
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# The Gemini clients are constructed at import time but never called here
+os.environ.setdefault("GOOGLE_API_KEY", "benchmark-placeholder")
+
+# services.rag.agent splits/watches its index at import: keep it off the real faiss_index
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="agent_construction_"))
+os.environ["FAISS_INDEX_DIR"] = str(SCRATCH_DIR / "faiss_index")
+os.environ["INDEX_WATCH_INTERVAL_SECONDS"] = "0"
+os.environ["CHUNK_EMBEDDING_CACHE_PATH"] = str(SCRATCH_DIR / "chunk_embeddings.sqlite")
+os.environ["INGEST_JOBS_DIR"] = str(SCRATCH_DIR / "jobs")
+
+from langchain.agents import create_agent  # noqa: E402
+from langchain.messages import AIMessage, HumanMessage  # noqa: E402
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from services.rag.agent import ChatContext, rag_tool, role_system_prompt  # noqa: E402
+
+
+class FakeToolChatModel(GenericFakeChatModel):
+    """Fake model that accepts bound tools and always answers directly"""
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+def make_model():
+    return FakeToolChatModel(messages=itertools.cycle([AIMessage("stub answer")]))
+
+
+def per_request(model, message, user_role):
+    agent = create_agent(model, tools=[rag_tool], system_prompt=f"""You are an AI assistant at FinSolve Technologies.call rag_tool when need with:
+    - user_role = {user_role}
+
+    Use the retrieved context to answer accurately.""")
+    return agent.invoke({"messages": [HumanMessage(message)]})
+
+
+def summarize(label, timings):
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{label:>28}: mean {statistics.mean(timings):8.3f} ms  p50 {statistics.median(timings):8.3f} ms  p95 {p95:8.3f} ms")
+
+
+def run(iterations):
+    model = make_model()
+    message = "What is the leave policy?"
+    roles = ["engineering", "hr", "finance", "employee", "c-levelexecutives"]
+
+    construct, old_path, new_path = [], [], []
+
+    for user_role in itertools.islice(itertools.cycle(roles), iterations):
+        start = time.perf_counter()
+        create_agent(model, tools=[rag_tool], system_prompt=f"role = {user_role}")
+        construct.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        per_request(model, message, user_role)
+        old_path.append((time.perf_counter() - start) * 1000)
+
+    shared_agent = create_agent(
+        model,
+        tools=[rag_tool],
+        middleware=[role_system_prompt],
+        context_schema=ChatContext
+    )
+    for user_role in itertools.islice(itertools.cycle(roles), iterations):
+        start = time.perf_counter()
+        shared_agent.invoke(
+            {"messages": [HumanMessage(message)]},
+            context=ChatContext(user_role=user_role)
+        )
+        new_path.append((time.perf_counter() - start) * 1000)
+
+    summarize("create_agent only", construct)
+    summarize("per-request agent + invoke", old_path)
+    summarize("shared agent invoke", new_path)
+    print(f"{'removed per request':>28}: {statistics.mean(old_path) - statistics.mean(new_path):8.3f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    try:
+        run(args.iterations)
+    finally:
+        shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
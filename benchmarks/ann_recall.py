@@ -0,0 +1,115 @@
+"""
+ann_recall.py
+-------------
+Recall@k and query latency of the ANN index types (IVF-Flat, HNSW, IVF-PQ)
+against exact flat search, as the corpus grows. Indexes are built with the
+same AnnConfig the ingestion path uses, and every search parameter in the
+sweep (nprobe / efSearch) is reported separately.
+
+Vectors are drawn from a Gaussian mixture (documents cluster by topic), so
+no embedding API calls are made. 1M x 768 float32 vectors need ~3 GB of RAM;
+pass --dim to shrink them.
+
+Usage (from the repository root):
+    python benchmarks/ann_recall.py --sizes 10000 100000 1000000
+    python benchmarks/ann_recall.py --types hnsw --ef-search 32 64 128
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from services.rag.ann import AnnConfig  # noqa: E402
+
+DIMENSIONS = 768  # models/embedding-001
+
+
+def build_corpus(size, dim, queries, rng, clusters=256):
+    centers = rng.standard_normal((clusters, dim)).astype("float32") * 4
+    labels = rng.integers(0, clusters, size + queries)
+    points = centers[labels] + rng.standard_normal((size + queries, dim)).astype("float32")
+    return points[:size], points[size:]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(index, queries, k, truth=None):
+    """Search one query at a time, as rag_tool does; return (ids, p50 ms, p99 ms, recall)"""
+    timings, found = [], []
+    for query in queries:
+        start = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        timings.append((time.perf_counter() - start) * 1000)
+        found.append(ids[0])
+
+    recall = None
+    if truth is not None:
+        hits = sum(len(set(ann) & set(exact)) for ann, exact in zip(found, truth))
+        recall = hits / (len(truth) * k)
+    return found, percentile(timings, 50), percentile(timings, 99), recall
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'chunks':>8} {'index':>9} {'param':>14} {'build s':>8} {'recall@k':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for size in args.sizes:
+        vectors, queries = build_corpus(size, args.dim, args.queries, rng)
+
+        start = time.perf_counter()
+        flat = AnnConfig(index_type="flat").build_index(vectors)
+        flat_build = time.perf_counter() - start
+        truth, p50, p99, _ = measure(flat, queries, args.k)
+        print(f"{size:>8} {'flat':>9} {'exact':>14} {flat_build:>8.2f} {1.0:>9.3f} {p50:>8.3f} {p99:>8.3f}")
+
+        for index_type in args.types:
+            config = AnnConfig(
+                index_type=index_type,
+                nlist=args.nlist or int(4 * np.sqrt(size)),
+                pq_m=args.pq_m,
+                hnsw_m=args.hnsw_m,
+                min_chunks=0
+            )
+            start = time.perf_counter()
+            index = config.build_index(vectors)
+            build = time.perf_counter() - start
+
+            if index_type == "hnsw":
+                sweep = [("efSearch", value, "ef_search") for value in args.ef_search]
+            else:
+                sweep = [("nprobe", value, "nprobe") for value in args.nprobe]
+
+            for label, value, field in sweep:
+                setattr(config, field, value)
+                config.tune(index)
+                _, p50, p99, recall = measure(index, queries, args.k, truth)
+                print(
+                    f"{size:>8} {index_type:>9} {f'{label}={value}':>14} {build:>8.2f} "
+                    f"{recall:>9.3f} {p50:>8.3f} {p99:>8.3f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "hnsw", "ivf_pq"])
+    parser.add_argument("--dim", type=int, default=DIMENSIONS)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nlist", type=int, default=0, help="IVF lists (default: 4 * sqrt(chunks))")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 8, 16, 64])
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--pq-m", type=int, default=64)
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run(args)
@@ -0,0 +1,208 @@
+"""
+db_concurrency.py
+-----------------
+Concurrent login-lookup and user-creation throughput against SQLite with
+the engine setups the app can use:
+
+- baseline: the previous engine (rollback journal, default pool, no busy timeout)
+- tuned:    db.database.make_engine (WAL, synchronous=NORMAL, busy timeout, sized pool)
+- async:    db.database.make_async_engine through aiosqlite
+
+Each setup gets a fresh database file seeded with users. Workers (threads
+for the sync engines, tasks for the async one) then loop for a fixed time,
+creating a user with probability --write-share and otherwise looking one
+up by username like /auth/login/ does. Passwords are pre-hashed: bcrypt
+runs on its own process pool and is not what is measured here.
+
+Usage (from the repository root):
+    python benchmarks/db_concurrency.py --concurrency 1 8 32 --duration 10
+    python benchmarks/db_concurrency.py --setups baseline tuned --write-share 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="db_concurrency_"))
+
+# db.database builds its engine at import; keep it off the real app.db
+os.environ["DATABASE_URL"] = f"sqlite:///{SCRATCH_DIR / 'unused.db'}"
+sys.path.insert(0, str(ROOT / "app"))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from core.security import hash_password  # noqa: E402
+from db import crud  # noqa: E402
+from db.database import Base, make_engine, make_async_engine  # noqa: E402
+from db.models import Role  # noqa: E402
+
+SETUPS = ("baseline", "tuned", "async")
+SEED_USERS = 200
+ROLE = "employee"
+
+
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def seed(url, password_hash):
+    """Create the schema, one role and SEED_USERS users in a fresh database"""
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        role = Role(name=ROLE, description=f"{ROLE} role")
+        db.add(role)
+        for i in range(SEED_USERS):
+            crud.create_user(db, f"seed-{i}", None, role, password_hash=password_hash)
+    engine.dispose()
+
+
+def summarize(latencies, errors, elapsed):
+    ops = len(latencies) + errors
+    return {
+        "ops": ops,
+        "throughput_ops": len(latencies) / elapsed,
+        "errors": errors,
+        "error_rate": errors / ops if ops else 0.0,
+        "mean_ms": statistics.mean(latencies) if latencies else None,
+        "p50_ms": percentile(latencies, 50),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+
+def run_sync(engine, concurrency, args, password_hash):
+    Session = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+    results = {"login": ([], [0]), "create": ([], [0])}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.duration
+
+    def worker(worker_id):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        created = 0
+        while time.perf_counter() < deadline:
+            op = "create" if rng.random() < args.write_share else "login"
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    if op == "create":
+                        role = crud.get_role_by_name(db, ROLE)
+                        crud.create_user(db, f"w{worker_id}-{created}", None, role, password_hash=password_hash)
+                        created += 1
+                    else:
+                        user = crud.get_user_by_username(db, f"seed-{rng.randrange(SEED_USERS)}")
+                        user.role.name
+                ok = True
+            except OperationalError:
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    results[op][0].append(elapsed)
+                else:
+                    results[op][1][0] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {op: summarize(latencies, errors[0], elapsed) for op, (latencies, errors) in results.items()}
+
+
+async def run_async(engine, concurrency, args, password_hash):
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    Session = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    results = {"login": ([], [0]), "create": ([], [0])}
+    deadline = time.perf_counter() + args.duration
+
+    async def worker(worker_id):
+        rng = random.Random(args.seed * 1000 + worker_id)
+        created = 0
+        while time.perf_counter() < deadline:
+            op = "create" if rng.random() < args.write_share else "login"
+            start = time.perf_counter()
+            try:
+                async with Session() as db:
+                    if op == "create":
+                        role = await crud.aget_role_by_name(db, ROLE)
+                        await crud.acreate_user(db, f"w{worker_id}-{created}", password_hash, role)
+                        created += 1
+                    else:
+                        user = await crud.aget_user_by_username(db, f"seed-{rng.randrange(SEED_USERS)}")
+                        user.role.name
+                ok = True
+            except OperationalError:
+                ok = False
+            if ok:
+                results[op][0].append((time.perf_counter() - start) * 1000)
+            else:
+                results[op][1][0] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return {op: summarize(latencies, errors[0], elapsed) for op, (latencies, errors) in results.items()}
+
+
+def run(args):
+    password_hash = hash_password("benchmark-password")
+    print(f"{'setup':>9} {'workers':>8} {'op':>7} {'ops/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    for setup in args.setups:
+        for concurrency in args.concurrency:
+            path = SCRATCH_DIR / f"{setup}-{concurrency}.db"
+            url = f"sqlite:///{path}"
+            seed(url, password_hash)
+
+            if setup == "baseline":
+                engine = create_engine(url, connect_args={"check_same_thread": False})
+                report = run_sync(engine, concurrency, args, password_hash)
+                engine.dispose()
+            elif setup == "tuned":
+                engine = make_engine(url)
+                report = run_sync(engine, concurrency, args, password_hash)
+                engine.dispose()
+            else:
+                engine = make_async_engine(f"sqlite+aiosqlite:///{path}")
+                report = asyncio.run(run_async(engine, concurrency, args, password_hash))
+
+            for op, row in report.items():
+                def ms(value):
+                    return f"{value:8.2f}" if value is not None else f"{'-':>8}"
+                print(
+                    f"{setup:>9} {concurrency:>8} {op:>7} {row['throughput_ops']:>9.1f} "
+                    f"{ms(row['p50_ms'])} {ms(row['p99_ms'])} {row['error_rate']:>7.1%}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--setups", nargs="+", choices=SETUPS, default=list(SETUPS))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per setup and concurrency level")
+    parser.add_argument("--write-share", type=float, default=0.2, help="Fraction of operations creating a user")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        run(args)
+    finally:
+        for path in SCRATCH_DIR.iterdir():
+            path.unlink()
+        SCRATCH_DIR.rmdir()
@@ -0,0 +1,319 @@
+"""
+load_test.py
+------------
+End-to-end load test of the FastAPI app (app/main.py) on one uvicorn worker.
+
+The server runs in a subprocess with the Gemini chat model and embeddings
+replaced by local stand-ins with configurable artificial latency, a scratch
+SQLite database seeded with one user per role, and an index built from
+resources/data. Closed-loop virtual users then send mixed-role /chat/ and
+/auth/login/ traffic at each concurrency level, and throughput, p50/p95/p99
+latency and error rate are reported per endpoint, showing where the worker
+saturates.
+
+Usage (from the repository root):
+    python benchmarks/load_test.py --concurrency 1 8 32 64 --duration 20
+    python benchmarks/load_test.py --llm-latency 0.8 --embed-latency 0.05 --login-share 0.2 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+APP_DIR = ROOT / "app"
+sys.path.insert(0, str(ROOT))
+
+PASSWORD = "load-test-password"
+
+
+# -------------------------------
+# Server side (runs in the subprocess)
+# -------------------------------
+def make_stub_chat_model(latency):
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.messages import AIMessage, HumanMessage
+    from langchain_core.outputs import ChatGeneration, ChatResult
+
+    class StubChatModel(BaseChatModel):
+        """Calls rag_tool with the question, then answers once the tool returns"""
+
+        latency: float = 0.0
+
+        @property
+        def _llm_type(self):
+            return "stub"
+
+        def bind_tools(self, tools, **kwargs):
+            return self
+
+        def _reply(self, messages):
+            last = messages[-1]
+            if isinstance(last, HumanMessage):
+                return AIMessage(content="", tool_calls=[{
+                    "name": "rag_tool",
+                    "args": {"query": last.content},
+                    "id": f"call_{uuid.uuid4().hex}",
+                    "type": "tool_call",
+                }])
+            return AIMessage(content=f"Stub answer from {len(str(last.content))} characters of context.")
+
+        def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+            time.sleep(self.latency)
+            return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+        async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+            await asyncio.sleep(self.latency)
+            return ChatResult(generations=[ChatGeneration(message=self._reply(messages))])
+
+    return StubChatModel(latency=latency)
+
+
+def make_stub_embeddings(latency):
+    from benchmarks.offline_retrieval.embedder import HashedNGramEmbeddings
+
+    class StubEmbeddings(HashedNGramEmbeddings):
+        """Local deterministic vectors, delayed like a remote embedding call"""
+
+        def embed_query(self, text):
+            time.sleep(latency)
+            return super().embed_query(text)
+
+        async def aembed_query(self, text):
+            await asyncio.sleep(latency)
+            return super().embed_query(text)
+
+    return StubEmbeddings()
+
+
+def serve(args):
+    work_dir = Path(args.work_dir)
+
+    # Settings are read at import time, so they are set before the app loads
+    os.environ.setdefault("GOOGLE_API_KEY", "load-test-placeholder")
+    os.environ["DATABASE_URL"] = f"sqlite:///{work_dir / 'load_test.db'}"
+    os.environ["ANSWER_CACHE_ENABLED"] = "true" if args.answer_cache else "false"
+    os.environ["INDEX_WATCH_INTERVAL_SECONDS"] = "0"
+    # services.rag.agent splits/watches its index at import: keep it off the real faiss_index
+    os.environ["FAISS_INDEX_DIR"] = str(work_dir / "faiss_index")
+    os.environ["CHUNK_EMBEDDING_CACHE_PATH"] = str(work_dir / "chunk_embeddings.sqlite")
+    os.environ["INGEST_JOBS_DIR"] = str(work_dir / "jobs")
+    sys.path.insert(0, str(APP_DIR))
+
+    import uvicorn
+    from langchain.agents import create_agent
+    from benchmarks.offline_retrieval.__main__ import ingest
+    from core.config import CORPUS_DATA_DIR, INDEX_MMAP
+    from db import crud
+    from db.database import SessionLocal
+    from db.init_db import init_db
+    from services.rag import agent as agent_module
+    from services.rag.embedding_cache import CachedEmbeddings, QueryEmbeddingCache
+    from services.rag.index_store import PartitionedIndex
+    from main import app
+
+    # 1️⃣ Index resources/data with the stand-in embedder
+    embedder = make_stub_embeddings(args.embed_latency)
+    index_root = Path(os.environ["FAISS_INDEX_DIR"])
+    ingest(CORPUS_DATA_DIR, index_root, embedder)
+
+    # 2️⃣ Swap the Gemini-backed objects for the stand-ins
+    embedding_model = CachedEmbeddings(embedder, QueryEmbeddingCache(max_entries=args.query_cache))
+    index = PartitionedIndex(index_root, embedding_model, mmap=INDEX_MMAP, ann=agent_module.ann_config)
+    agent_module.embedding_model = embedding_model
+    agent_module.partitioned_index = index
+    agent_module.retriever.index = index
+    agent_module.retriever.embeddings = embedding_model
+    agent_module.agent = create_agent(
+        make_stub_chat_model(args.llm_latency),
+        tools=[agent_module.rag_tool],
+        middleware=[agent_module.role_system_prompt, agent_module.StageTimingMiddleware()],
+        context_schema=agent_module.ChatContext
+    )
+
+    # 3️⃣ Seed the built-in roles and one user per role (the lifespan only creates tables)
+    init_db()
+    db = SessionLocal()
+    try:
+        for role in args.roles:
+            username = f"loadtest-{role}"
+            if crud.get_user_by_username(db, username) is None:
+                crud.create_user(db, username, PASSWORD, crud.get_role_by_name(db, role))
+    finally:
+        db.close()
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning", access_log=False)
+
+
+# -------------------------------
+# Load generator
+# -------------------------------
+def percentile(samples, pct):
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url, process, timeout):
+    import httpx
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if httpx.get(f"{base_url}/openapi.json", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"Server not ready after {timeout}s")
+
+
+async def drive(base_url, concurrency, duration, args, role_queries):
+    import httpx
+
+    samples = {"/chat/": [], "/auth/login/": []}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        # Chat is authorized by the login token; log each role in once up front
+        tokens = {}
+        for role in args.roles:
+            response = await client.post("/auth/login/", json={"username": f"loadtest-{role}", "password": PASSWORD})
+            response.raise_for_status()
+            tokens[role] = response.json()["access_token"]
+
+        deadline = time.perf_counter() + duration
+
+        async def virtual_user(user_id):
+            rng = random.Random(args.seed * 1000 + user_id)
+            while time.perf_counter() < deadline:
+                role = rng.choice(args.roles)
+                if rng.random() < args.login_share:
+                    path, body, headers = "/auth/login/", {"username": f"loadtest-{role}", "password": PASSWORD}, {}
+                else:
+                    path, body = "/chat/", {"user_query": rng.choice(role_queries[role])}
+                    headers = {"Authorization": f"Bearer {tokens[role]}"}
+
+                start = time.perf_counter()
+                try:
+                    response = await client.post(path, json=body, headers=headers)
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                samples[path].append((time.perf_counter() - start) * 1000 if ok else None)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(virtual_user(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    report = {}
+    for path, results in samples.items():
+        latencies = [ms for ms in results if ms is not None]
+        errors = len(results) - len(latencies)
+        report[path] = {
+            "requests": len(results),
+            "errors": errors,
+            "error_rate": errors / len(results) if results else 0.0,
+            "throughput_rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+    return report
+
+
+def run(args):
+    from benchmarks.offline_retrieval.__main__ import ROLE_QUERIES
+
+    work_dir = Path(tempfile.mkdtemp(prefix="load_test_"))
+    port = args.port or free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [
+        sys.executable, __file__, "--serve",
+        "--work-dir", str(work_dir),
+        "--port", str(port),
+        "--llm-latency", str(args.llm_latency),
+        "--embed-latency", str(args.embed_latency),
+        "--query-cache", str(args.query_cache),
+        "--roles", *args.roles,
+    ] + (["--answer-cache"] if args.answer_cache else [])
+
+    server = subprocess.Popen(command, cwd=ROOT)
+    results = []
+    try:
+        wait_until_ready(base_url, server, args.startup_timeout)
+        print(f"{'users':>6} {'endpoint':>13} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+
+        for concurrency in args.concurrency:
+            report = asyncio.run(drive(base_url, concurrency, args.duration, args, ROLE_QUERIES))
+            results.append({"concurrency": concurrency, "endpoints": report})
+            for path, row in report.items():
+                def ms(value):
+                    return f"{value:9.1f}" if value is not None else f"{'-':>9}"
+                print(
+                    f"{concurrency:>6} {path:>13} {row['throughput_rps']:>8.1f} "
+                    f"{ms(row['p50_ms'])} {ms(row['p95_ms'])} {ms(row['p99_ms'])} {row['error_rate']:>7.1%}"
+                )
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        settings = {
+            "llm_latency": args.llm_latency,
+            "embed_latency": args.embed_latency,
+            "login_share": args.login_share,
+            "duration": args.duration,
+            "answer_cache": args.answer_cache,
+            "query_cache": args.query_cache,
+        }
+        Path(args.output).write_text(json.dumps({"settings": settings, "levels": results}, indent=2))
+        print(f"✅ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32, 64])
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per concurrency level")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stub LLM call (two per chat)")
+    parser.add_argument("--embed-latency", type=float, default=0.05, help="Seconds per stub query embedding")
+    parser.add_argument("--login-share", type=float, default=0.2, help="Fraction of requests that are logins")
+    parser.add_argument("--roles", nargs="+", default=["c-levelexecutives", "employee", "engineering", "finance", "hr", "marketing"])
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache on")
+    parser.add_argument("--query-cache", type=int, default=0, help="Query embedding LRU size (0: every chat embeds)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=180.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--output", help="Also write the results as JSON")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--work-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+    else:
+        run(args)
@@ -0,0 +1,148 @@
+"""
+mmap_startup.py
+---------------
+Compares per-worker startup time and memory of loading a partition with
+FAISS.load_local (every process copies the vectors into its heap) against the
+read-only memory-mapped load used by the server (processes share the
+page-cache pages). Workers are started like uvicorn workers and stay alive
+together, so PSS shows how much memory each one really costs. Each index
+type is measured, since flat/HNSW codes and IVF inverted lists are mapped
+with different faiss flags.
+Random vectors are used, so no embedding API calls are made.
+
+Usage (from the repository root, Linux for RSS/PSS):
+    python benchmarks/mmap_startup.py --chunks 200000 --workers 4
+    python benchmarks/mmap_startup.py --index-types flat ivf_flat ivf_pq hnsw
+"""
+
+import argparse
+import multiprocessing
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from services.rag.ann import AnnConfig, INDEX_TYPES  # noqa: E402
+from services.rag.segments import append_segment, load_segmented_store  # noqa: E402
+
+DIMENSIONS = 768  # models/embedding-001
+
+
+class NoEmbeddings(Embeddings):
+    """Vectors are supplied directly; the store never embeds text here"""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def memory_kb():
+    """(rss_kb, pss_kb) of this process; PSS splits shared pages between sharers"""
+    values = {}
+    try:
+        with open("/proc/self/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[0] in ("Rss:", "Pss:"):
+                    values[parts[0][:-1]] = int(parts[1])
+    except OSError:
+        import resource
+        values["Rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return values.get("Rss"), values.get("Pss")
+
+
+def worker(path, mmap, barrier, results):
+    baseline_rss, baseline_pss = memory_kb()
+
+    start = time.perf_counter()
+    store = load_segmented_store(path, NoEmbeddings(), mmap=mmap)
+    load_seconds = time.perf_counter() - start
+
+    # Searches touch the vectors (every one for flat), like a worker that has served traffic
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        store.similarity_search_with_score_by_vector(rng.random(DIMENSIONS, dtype=np.float32).tolist(), k=5)
+
+    # Measure while every worker holds the index, so shared pages are split
+    barrier.wait()
+    rss, pss = memory_kb()
+    results.put({
+        "load_seconds": load_seconds,
+        "rss_mb": (rss - baseline_rss) / 1024 if rss else None,
+        "pss_mb": (pss - baseline_pss) / 1024 if pss else None,
+    })
+    barrier.wait()
+
+
+def run(path, mmap, workers):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [
+        context.Process(target=worker, args=(path, mmap, barrier, results))
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return rows
+
+
+def build_partition(root, chunks, index_type):
+    ann = AnnConfig(index_type=index_type, nlist=256, min_chunks=0)
+    rng = np.random.default_rng(42)
+    vectors = rng.random((chunks, DIMENSIONS), dtype=np.float32)
+    append_segment(
+        root,
+        [(f"chunk {i}", vector.tolist()) for i, vector in enumerate(vectors)],
+        [{"source": f"doc-{i // 50}.pdf", "category": "engineering"} for i in range(chunks)],
+        [f"engineering:{i}" for i in range(chunks)],
+        NoEmbeddings(),
+        build_store=ann.build_store
+    )
+
+
+def summarize(label, rows):
+    def mean(key):
+        values = [row[key] for row in rows if row[key] is not None]
+        return statistics.mean(values) if values else float("nan")
+
+    print(
+        f"{label:<12} load {mean('load_seconds') * 1000:8.1f} ms/worker | "
+        f"RSS {mean('rss_mb'):8.1f} MB/worker | PSS {mean('pss_mb'):8.1f} MB/worker | "
+        f"total PSS {mean('pss_mb') * len(rows):8.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunks", type=int, default=200000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--index-types", nargs="+", choices=INDEX_TYPES, default=["flat", "ivf_flat"])
+    args = parser.parse_args()
+
+    for index_type in args.index_types:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "engineering"
+            print(f"🔧 Building {index_type} partition with {args.chunks} x {DIMENSIONS} vectors...")
+            build_partition(path, args.chunks, index_type)
+            size_mb = sum(f.stat().st_size for f in path.rglob("index.faiss")) / (1024 * 1024)
+            print(f"   index.faiss: {size_mb:.1f} MB, {args.workers} workers\n")
+
+            summarize("load_local", run(path, False, args.workers))
+            summarize("mmap", run(path, True, args.workers))
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+offline_retrieval
+-----------------
+Offline retrieval benchmark over resources/data. Documents are chunked by
+the same parser as services.rag.sync, embedded with a deterministic hashed
+n-gram function instead of the Gemini API, written as index segments, and
+queried through the same Retriever as rag_tool. Results are JSON so runs
+can be compared between commits.
+
+Usage (from the repository root):
+    python -m benchmarks.offline_retrieval --output before.json
+    python -m benchmarks.offline_retrieval --modes lexical --repeat 20
+"""
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "app"))
+
+from core.config import CORPUS_DATA_DIR, INDEX_TYPE, INDEX_MMAP  # noqa: E402
+from services.rag.ann import configured_ann  # noqa: E402
+from services.rag.embedding_cache import CachedEmbeddings, QueryEmbeddingCache  # noqa: E402
+from services.rag.embedding_pipeline import EmbeddingPipeline  # noqa: E402
+from services.rag.index_store import PartitionedIndex, partition_name  # noqa: E402
+from services.rag.parsing import CORPUS_EXTENSIONS, parse_corpus_file  # noqa: E402
+from services.rag.retrieval import RETRIEVAL_MODES, Retriever, categories_for_role  # noqa: E402
+from services.rag.segments import append_segment  # noqa: E402
+
+from benchmarks.offline_retrieval import __doc__ as DESCRIPTION  # noqa: E402
+from benchmarks.offline_retrieval.embedder import HashedNGramEmbeddings  # noqa: E402
+
+# Questions per role, mixing paraphrases with exact tokens (IDs, quarters)
+ROLE_QUERIES = {
+    "c-levelexecutives": [
+        "What was the revenue growth in Q3 2024?",
+        "Summarize the marketing campaign results for 2024",
+        "What is the engineering technology stack?",
+        "Who is the manager of FINEMP1001?",
+    ],
+    "employee": [
+        "How many days of annual leave do I get?",
+        "What is the code of conduct?",
+        "How do I claim reimbursement for travel?",
+    ],
+    "engineering": [
+        "Describe the system architecture",
+        "What is the CI/CD pipeline?",
+        "How are microservices secured?",
+    ],
+    "finance": [
+        "What were the quarterly expenses in Q1 2024?",
+        "Cash flow summary for the year",
+        "What is the gross margin?",
+    ],
+    "hr": [
+        "What is the leave balance of FINEMP1000?",
+        "Which employees work in Pune?",
+        "Attendance percentage of Credit Officers",
+    ],
+    "marketing": [
+        "Customer acquisition cost in Q4 2024",
+        "Which campaigns had the best ROI?",
+        "Marketing budget for Q2 2024",
+    ],
+}
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    return {
+        "count": len(ordered),
+        "mean": statistics.mean(ordered),
+        "p50": pct(50),
+        "p90": pct(90),
+        "p95": pct(95),
+        "p99": pct(99),
+        "max": ordered[-1],
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ingest(data_dir, index_root, embedder):
+    """Chunk, embed and write every department like services.rag.sync does"""
+    ann = configured_ann()
+    pipeline = EmbeddingPipeline(embedder, batch_size=100, max_concurrency=1)
+    totals = {"files": 0, "chunks": 0, "parse_seconds": 0.0, "embed_seconds": 0.0, "write_seconds": 0.0}
+    partitions = {}
+
+    for dept_path in sorted(Path(data_dir).iterdir()):
+        if not dept_path.is_dir():
+            continue
+        category = partition_name(dept_path.name)
+        files = sorted(
+            path for path in dept_path.rglob("*")
+            if path.is_file() and path.suffix.lower() in CORPUS_EXTENSIONS
+        )
+
+        start = time.perf_counter()
+        split_docs = []
+        for path in files:
+            split_docs.extend(parse_corpus_file(path, category, path.relative_to(dept_path).as_posix()))
+        parse_seconds = time.perf_counter() - start
+
+        texts = [doc.page_content for doc in split_docs]
+        vectors, stats = pipeline.embed(texts)
+
+        start = time.perf_counter()
+        per_source = {}
+        ids = []
+        for doc in split_docs:
+            source = doc.metadata["source"]
+            per_source[source] = per_source.get(source, 0) + 1
+            ids.append(f"{category}:{source}:{per_source[source]}")
+        append_segment(
+            index_root / category,
+            list(zip(texts, vectors)),
+            [doc.metadata for doc in split_docs],
+            ids,
+            embedder,
+            build_store=ann.build_store
+        )
+        write_seconds = time.perf_counter() - start
+
+        size = sum(path.stat().st_size for path in (index_root / category).rglob("*") if path.is_file())
+        partitions[category] = {"files": len(files), "chunks": len(split_docs), "bytes": size}
+        totals["files"] += len(files)
+        totals["chunks"] += len(split_docs)
+        totals["parse_seconds"] += parse_seconds
+        totals["embed_seconds"] += stats.seconds
+        totals["write_seconds"] += write_seconds
+
+    seconds = totals["parse_seconds"] + totals["embed_seconds"] + totals["write_seconds"]
+    totals["seconds"] = seconds
+    totals["chunks_per_second"] = totals["chunks"] / seconds if seconds else 0.0
+    index = {
+        "type": INDEX_TYPE,
+        "bytes": sum(p["bytes"] for p in partitions.values()),
+        "partitions": partitions,
+    }
+    return totals, index
+
+
+async def query_mode(index, embeddings, mode, repeat):
+    retriever = Retriever(index, embeddings, mode=mode)
+    latencies = []
+    roles = {}
+
+    # Warm up: the first query of each partition loads it from disk
+    for role, questions in ROLE_QUERIES.items():
+        await retriever.search(questions[0], role)
+
+    for role, questions in ROLE_QUERIES.items():
+        role_latencies, hits, sources = [], [], set()
+        for _ in range(repeat):
+            for question in questions:
+                start = time.perf_counter()
+                results = await retriever.search(question, role)
+                role_latencies.append((time.perf_counter() - start) * 1000)
+                hits.append(len(results))
+                sources.update(doc.metadata.get("source") for doc, _ in results)
+
+        categories, k = categories_for_role(role)
+        roles[role] = {
+            "categories": categories,
+            "k": k,
+            "queries": len(hits),
+            "mean_results": statistics.mean(hits),
+            "min_results": min(hits),
+            "distinct_sources": len(sources),
+            "latency_ms": percentiles(role_latencies),
+        }
+        latencies.extend(role_latencies)
+
+    return {"latency_ms": percentiles(latencies), "roles": roles}
+
+
+def run(args):
+    embedder = HashedNGramEmbeddings(dimensions=args.dimensions)
+    # Queries go through the same in-memory query cache as the server
+    query_embeddings = CachedEmbeddings(embedder, QueryEmbeddingCache(max_entries=args.query_cache))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_root = Path(tmp)
+        ingest_stats, index_stats = ingest(args.data_dir, index_root, embedder)
+
+        index = PartitionedIndex(index_root, query_embeddings, mmap=INDEX_MMAP, ann=configured_ann())
+        queries = {
+            mode: asyncio.run(query_mode(index, query_embeddings, mode, args.repeat))
+            for mode in args.modes
+        }
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "embedder": embedder.model,
+            "data_dir": str(args.data_dir),
+            "mmap": INDEX_MMAP,
+            "repeat": args.repeat,
+            "query_cache": args.query_cache,
+        },
+        "ingest": ingest_stats,
+        "index": index_stats,
+        "queries": queries,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=CORPUS_DATA_DIR)
+    parser.add_argument("--modes", nargs="+", choices=RETRIEVAL_MODES, default=list(RETRIEVAL_MODES))
+    parser.add_argument("--repeat", type=int, default=10, help="Passes over the query set per role")
+    parser.add_argument("--dimensions", type=int, default=768)
+    parser.add_argument("--query-cache", type=int, default=0, help="Query embedding LRU size (0 measures every embed)")
+    parser.add_argument("--output", default="offline_retrieval.json", help="JSON results file")
+    args = parser.parse_args()
+
+    # Written to a file: index loading logs go to stdout
+    Path(args.output).write_text(json.dumps(run(args), indent=2))
+    print(f"✅ Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+embedder.py
+-----------
+Deterministic local embedding function for offline benchmarks.
+
+Each token contributes its word and character n-grams, hashed into a fixed
+number of dimensions with a hash-derived sign (feature hashing). The same
+text always yields the same unit vector, on any machine, with no API calls.
+"""
+
+import hashlib
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from services.rag.lexical import tokenize
+
+
+class HashedNGramEmbeddings(Embeddings):
+    def __init__(self, dimensions=768, ngram_range=(3, 5)):
+        self.dimensions = dimensions
+        self.ngram_range = ngram_range
+        # Identifies the vectors in the chunk cache and benchmark output
+        self.model = f"hashed-ngram-{dimensions}-{ngram_range[0]}-{ngram_range[1]}"
+
+    def _features(self, token):
+        yield token
+        padded = f"<{token}>"
+        low, high = self.ngram_range
+        for n in range(low, high + 1):
+            for i in range(len(padded) - n + 1):
+                yield padded[i:i + n]
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in tokenize(text):
+            for feature in self._features(token):
+                digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+                vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
@@ -0,0 +1,136 @@
+"""
+partition_latency.py
+--------------------
+Compares retrieval latency of the old shared FAISS index with metadata
+post-filtering against the per-category partitions used by rag_tool, as the
+total corpus grows. Random vectors are used, so no embedding API calls are made.
+
+Usage (from the repository root):
+    python benchmarks/partition_latency.py --sizes 1000 10000 100000
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "app"))
+
+from services.rag.index_store import PartitionedIndex  # noqa: E402
+from services.rag.segments import publish_index_version  # noqa: E402
+
+DIMENSIONS = 768  # models/embedding-001
+
+# Skewed like a real deployment: general is a small department
+CATEGORY_SHARES = {
+    "engineering": 0.40,
+    "marketing": 0.30,
+    "finance": 0.15,
+    "hr": 0.13,
+    "general": 0.02,
+}
+
+ROLE_QUERIES = {
+    "employee": (["general"], 3),
+    "hr": (["hr"], 3),
+    "c-levelexecutives": (list(CATEGORY_SHARES), 5),
+}
+
+
+class VectorOnlyEmbeddings(Embeddings):
+    """Placeholder: the benchmark only searches by precomputed vectors"""
+
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+def build_corpus(size, rng):
+    corpus = {}
+    for category, share in CATEGORY_SHARES.items():
+        count = max(1, int(size * share))
+        vectors = rng.standard_normal((count, DIMENSIONS)).astype("float32")
+        corpus[category] = vectors
+    return corpus
+
+
+def build_shared(corpus, embedding):
+    text_embeddings, metadatas = [], []
+    for category, vectors in corpus.items():
+        for i, vector in enumerate(vectors):
+            text_embeddings.append((f"{category} chunk {i}", vector.tolist()))
+            metadatas.append({"category": category, "source": f"{category}.md"})
+    return FAISS.from_embeddings(text_embeddings, embedding, metadatas=metadatas)
+
+
+def build_partitions(corpus, embedding, root):
+    for category, vectors in corpus.items():
+        store = FAISS.from_embeddings(
+            [(f"{category} chunk {i}", vector.tolist()) for i, vector in enumerate(vectors)],
+            embedding,
+            metadatas=[{"category": category, "source": f"{category}.md"}] * len(vectors)
+        )
+        store.save_local(root / category)
+        publish_index_version(root / category)
+    return PartitionedIndex(root, embedding)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(sizes, queries, seed):
+    rng = np.random.default_rng(seed)
+    embedding = VectorOnlyEmbeddings()
+    query_vectors = rng.standard_normal((queries, DIMENSIONS)).astype("float32").tolist()
+
+    print(f"{'chunks':>8} {'role':>18} {'mode':>12} {'p50 ms':>8} {'p95 ms':>8} {'avg hits':>9}")
+    for size in sizes:
+        corpus = build_corpus(size, rng)
+        shared = build_shared(corpus, embedding)
+
+        with tempfile.TemporaryDirectory() as root:
+            partitioned = build_partitions(corpus, embedding, Path(root))
+
+            for role, (categories, k) in ROLE_QUERIES.items():
+                shared_filter = {"category": {"$in": categories}} if len(categories) > 1 else {"category": categories[0]}
+
+                modes = {
+                    "shared": lambda vector: shared.similarity_search_with_score_by_vector(
+                        vector, k=k, filter=shared_filter
+                    ),
+                    "partitioned": lambda vector: partitioned.search_by_vector(vector, categories, k),
+                }
+
+                for mode, search in modes.items():
+                    timings, hits = [], []
+                    for vector in query_vectors:
+                        start = time.perf_counter()
+                        results = search(vector)
+                        timings.append((time.perf_counter() - start) * 1000)
+                        hits.append(len(results))
+
+                    print(
+                        f"{size:>8} {role:>18} {mode:>12} "
+                        f"{statistics.median(timings):>8.3f} {percentile(timings, 95):>8.3f} "
+                        f"{statistics.mean(hits):>9.2f}"
+                    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    run(args.sizes, args.queries, args.seed)
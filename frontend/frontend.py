@@ -4,7 +4,7 @@ import time
 from helper import (
     create_role, create_user, cleanup_old_sessions, load_session, 
     save_session, delete_session, generate_session_id, 
-    chat_api_call_stream, get_roles
+    chat_api_call_stream, get_roles, get_ingest_job, auth_headers
 )
 import os
 from dotenv import load_dotenv
@@ -114,17 +114,20 @@ def initialize_session_state():
                 st.session_state.logged_in = session_data.get('logged_in', False)
                 st.session_state.username = session_data.get('username')
                 st.session_state.role = session_data.get('role')
+                st.session_state.token = session_data.get('token')
                 st.session_state.chat_history = session_data.get('chat_history', [])
             else:
                 st.session_state.logged_in = False
                 st.session_state.username = None
                 st.session_state.role = None
+                st.session_state.token = None
                 st.session_state.chat_history = []
         else:
             st.session_state.session_id = generate_session_id()
             st.session_state.logged_in = False
             st.session_state.username = None
             st.session_state.role = None
+            st.session_state.token = None
             st.session_state.chat_history = []
     
     if 'menu_option' not in st.session_state:
@@ -148,6 +151,7 @@ def persist_session():
             'logged_in': st.session_state.logged_in,
             'username': st.session_state.username,
             'role': st.session_state.role,
+            'token': st.session_state.token,
             'chat_history': st.session_state.chat_history
         }
         save_session(st.session_state.session_id, session_data)
@@ -167,6 +171,7 @@ def login(username, password):
             st.session_state.logged_in = True
             st.session_state.username = data['username']
             st.session_state.role = data['role']
+            st.session_state.token = data['access_token']
             st.session_state.chat_history = []
             persist_session()
             return True, data
@@ -195,6 +200,7 @@ def logout_callback():
         st.session_state.logged_in = False
         st.session_state.username = None
         st.session_state.role = None
+        st.session_state.token = None
         st.session_state.chat_history = []
         st.query_params.clear()
         st.session_state.session_id = generate_session_id()
@@ -283,6 +289,34 @@ def render_sidebar():
         if logout_btn:
             st.rerun()
 
+def build_answer_markdown(answer, tool_name, sources):
+    """Build the assistant message: tool used, answer text and unique sources"""
+    final_markdown = ""
+
+    # Tool info
+    if tool_name:
+        final_markdown += f"**🛠 Tool used:** `{tool_name}`\n\n"
+
+    # Main answer
+    final_markdown += answer
+
+    # Sources at bottom
+    if sources:
+        seen = set()
+        unique_sources = []
+
+        for src in sources:
+            name = src.get("source")
+            if name and name not in seen:
+                seen.add(name)
+                unique_sources.append(name)
+
+        final_markdown += "\n\n---\n**Sources:**\n"
+        for name in unique_sources:
+            final_markdown += f"- 📄 `{name}`\n"
+
+    return final_markdown
+
 def render_chatbot():
     """Render the chatbot interface"""
     st.markdown(
@@ -319,37 +353,34 @@ def render_chatbot():
 
             spinner_placeholder.markdown("⏳ *Thinking...*")
 
-            success, answer, tool_name, sources = chat_api_call_stream(
-                user_input,
-                st.session_state.role
-            )
+            tool_name = None
+            answer = ""
+            sources = []
+            error = None
+
+            # Render tokens as they arrive
+            for event, data in chat_api_call_stream(user_input, st.session_state.token):
+                if event == "tool_start":
+                    tool_name = data.get("tool_name")
+                    answer = ""
+                    spinner_placeholder.markdown("🔍 *Searching documents...*")
+                elif event == "sources":
+                    sources = data.get("sources") or []
+                elif event == "token":
+                    spinner_placeholder.empty()
+                    answer += data.get("text", "")
+                    message_placeholder.markdown(build_answer_markdown(answer, tool_name, []) + "▌")
+                elif event == "done":
+                    answer = data.get("answer") or answer
+                    tool_name = data.get("tool_name") or tool_name
+                    sources = data.get("sources") or sources
+                elif event == "error":
+                    error = data.get("message")
 
             spinner_placeholder.empty()
 
-            if success:
-                final_markdown = ""
-
-                # Tool info
-                if tool_name:
-                    final_markdown += f"**🛠 Tool used:** `{tool_name}`\n\n"
-
-                # Main answer
-                final_markdown += answer
-
-                # Sources at bottom
-                if sources:
-                    seen = set()
-                    unique_sources = []
-
-                    for src in sources:
-                        name = src.get("source")
-                        if name and name not in seen:
-                            seen.add(name)
-                            unique_sources.append(name)
-
-                    final_markdown += "\n\n---\n**Sources:**\n"
-                    for name in unique_sources:
-                        final_markdown += f"- 📄 `{name}`\n"
+            if error is None:
+                final_markdown = build_answer_markdown(answer, tool_name, sources)
 
                 message_placeholder.markdown(final_markdown)
 
@@ -358,7 +389,7 @@ def render_chatbot():
                     "content": final_markdown
                 })
             else:
-                error_msg = f"❌ Error: {answer}"
+                error_msg = f"❌ Error: {error}"
                 message_placeholder.markdown(error_msg)
                 st.session_state.chat_history.append({
                     "role": "assistant",
@@ -402,7 +433,7 @@ def render_document_upload():
         if uploaded_file is None:
             st.warning("Please upload a PDF file")
         else:
-            with st.spinner("Uploading and processing PDF..."):
+            with st.spinner("Uploading PDF..."):
                 files = {
                     "file": (
                         uploaded_file.name,
@@ -419,12 +450,16 @@ def render_document_upload():
                     f"{API_BASE_URL}/embeddings/ingest/",
                     files=files,
                     params=params,
+                    headers=auth_headers(st.session_state.token),
                     timeout=120
                 )
 
-                if response.status_code == 200:
+            if response.status_code == 202:
+                job = wait_for_ingest_job(response.json()["job_id"])
+
+                if job and job["status"] == "completed":
                     st.success("✅ PDF ingested successfully")
-                    st.json(response.json())
+                    st.json(job)
 
                      # 🔥 Reset uploader & UI
                     st.session_state.upload_key += 1
@@ -434,8 +469,59 @@ def render_document_upload():
 
                     st.rerun()
                 else:
-                    st.error("❌ Upload failed")
-                    st.text(response.text)
+                    st.error("❌ Ingestion failed")
+                    if job:
+                        st.text(job.get("error") or "")
+            else:
+                st.error("❌ Upload failed")
+                st.text(response.text)
+
+def wait_for_ingest_job(job_id, poll_interval=1.0, max_failures=30, timeout=1800):
+    """
+    Poll an ingestion job and show its progress until it finishes. Gives up
+    after max_failures status lookups in a row fail, or after timeout seconds.
+    """
+    status_placeholder = st.empty()
+    progress_bar = st.progress(0)
+    deadline = time.time() + timeout
+    failures = 0
+
+    while True:
+        if time.time() > deadline:
+            job = {"status": "failed", "error": f"Gave up waiting for the job after {timeout}s"}
+        else:
+            job = get_ingest_job(job_id, st.session_state.token)
+
+        if job is None:
+            failures += 1
+            if failures >= max_failures:
+                job = {"status": "failed", "error": "Could not reach the server for the job status"}
+            else:
+                status_placeholder.warning("⚠️ Waiting for job status...")
+                time.sleep(poll_interval)
+                continue
+        failures = 0
+
+        if "stage" not in job:
+            status_placeholder.empty()
+            progress_bar.empty()
+            return job
+
+        total = job.get("chunks_total") or 0
+        embedded = job.get("chunks_embedded") or 0
+        progress_bar.progress(min(embedded / total, 1.0) if total else 0.0)
+        status_placeholder.markdown(
+            f"⏳ **{job['stage'].capitalize()}** · "
+            f"pages parsed: {job.get('pages_parsed', 0)} · "
+            f"chunks embedded: {embedded}/{total}"
+        )
+
+        if job["status"] in ("completed", "failed"):
+            status_placeholder.empty()
+            progress_bar.empty()
+            return job
+
+        time.sleep(poll_interval)
 
 def render_user_management():
     """Render the user management interface"""
@@ -475,7 +561,8 @@ def render_user_management():
                     success, result = create_user(
                         new_username,
                         new_password,
-                        user_role
+                        user_role,
+                        st.session_state.token
                     )
                 
                 st.session_state.creating_user = False
@@ -506,7 +593,7 @@ def render_user_management():
                 st.session_state.creating_role = True
                 
                 with st.spinner("Creating role..."):
-                    success, result = create_role(role_name, role_description)
+                    success, result = create_role(role_name, role_description, st.session_state.token)
                 
                 st.session_state.creating_role = False
                 
@@ -69,49 +69,98 @@ def delete_session(session_id):
             print(f"Error deleting session: {e}")
 
 def get_roles():
-    """Get all roles"""
+    """Get all roles, following the pagination cursor"""
     try:
         url = f"{API_BASE_URL}/roles/"
-        response = requests.get(url)
+        roles = []
+        params = {"limit": 1000}
+        while True:
+            response = requests.get(url, params=params)
+            if response.status_code != 200:
+                return roles
+            roles.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                return roles
+            params["cursor"] = cursor
+    except Exception as e:
+        return str(e)
+
+
+def auth_headers(token):
+    """Authorization header for endpoints that need the login token"""
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+# Job lookups that will not succeed by polling again
+TERMINAL_JOB_ERRORS = {
+    401: "Session expired. Please log in again.",
+    403: "Your role may not ingest documents.",
+    404: "Job not found (it may have expired or the server restarted).",
+}
+
+
+def get_ingest_job(job_id, token):
+    """
+    Get the status of a background ingestion job. Terminal lookup errors are
+    returned as a failed job; None means the status could not be fetched yet.
+    """
+    try:
+        response = requests.get(
+            f"{API_BASE_URL}/embeddings/jobs/{job_id}", headers=auth_headers(token), timeout=10
+        )
         if response.status_code == 200:
             return response.json()
+        if response.status_code in TERMINAL_JOB_ERRORS:
+            return {"status": "failed", "error": TERMINAL_JOB_ERRORS[response.status_code]}
     except Exception as e:
-        return str(e)
+        print(f"Error fetching job {job_id}: {e}")
+    return None
 
 
-def chat_api_call_stream(message, user_role):
-    """Call the streaming chat API endpoint"""
+def chat_api_call_stream(message, token):
+    """
+    Call the streaming chat API endpoint and yield (event, data) pairs
+    as Server-Sent Events arrive. The role is taken from the login token.
+    """
     try:
         payload = {
-            "user_query": message,
-            "user_role": user_role
+            "user_query": message
         }
         
-        response = requests.post(
-            f"{API_BASE_URL}/chat/",
+        with requests.post(
+            f"{API_BASE_URL}/chat/stream/",
             json=payload,
+            headers=auth_headers(token),
+            stream=True,
             timeout=60
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            return (
-                True,
-                data.get("answer", ""),
-                data.get("tool_name"),
-                data.get("sources")
-            )
-        elif response.status_code == 403:
-            return False, "Role mismatch.", None, None
-        else:
-            return False, f"Chat failed ({response.status_code})", None, None
+        ) as response:
+
+            if response.status_code == 401:
+                yield "error", {"message": "Session expired. Please log in again."}
+                return
+            if response.status_code == 403:
+                yield "error", {"message": "Role mismatch."}
+                return
+            if response.status_code != 200:
+                yield "error", {"message": f"Chat failed ({response.status_code})"}
+                return
+
+            event = "message"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):].strip())
             
     except Exception as e:
-        return False, str(e), None, None
+        yield "error", {"message": str(e)}
     
 
-def create_user(username, password, role):
-    """Create a new user"""
+def create_user(username, password, role, token):
+    """Create a new user (needs an admin login token)"""
     try:
         payload = {
             "username": username,
@@ -122,6 +171,7 @@ def create_user(username, password, role):
         response = requests.post(
             f"{API_BASE_URL}/users/",
             json=payload,
+            headers=auth_headers(token),
             timeout=60
         )
 
@@ -131,6 +181,10 @@ def create_user(username, password, role):
             return True, data['id']
         elif response.status_code == 409:
             return False, "User already exists."
+        elif response.status_code == 401:
+            return False, "Session expired. Please log in again."
+        elif response.status_code == 403:
+            return False, "Your role may not create users."
 
         else:
             return False, f"User creation failed ({response.status_code})"
@@ -138,8 +192,8 @@ def create_user(username, password, role):
     except Exception as e:
         return False, str(e)
 
-def create_role(name, description):
-    """Create a new user"""
+def create_role(name, description, token):
+    """Create a new role (needs an admin login token)"""
     try:
         payload = {
             "name": name,
@@ -149,6 +203,7 @@ def create_role(name, description):
         response = requests.post(
             f"{API_BASE_URL}/roles/",
             json=payload,
+            headers=auth_headers(token),
             timeout=60
         )
 
@@ -159,6 +214,10 @@ def create_role(name, description):
             return True, data['id']
         elif response.status_code == 409:
             return False, "Role already exists."
+        elif response.status_code == 401:
+            return False, "Session expired. Please log in again."
+        elif response.status_code == 403:
+            return False, "Your role may not create roles."
 
         else:
             return False, f"Role creation failed ({response.status_code})"
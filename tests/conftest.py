@@ -0,0 +1,12 @@
+import os
+import tempfile
+
+# core.config reads these at import: keep tests off the developer's faiss_index
+# and out of background watcher threads
+os.environ.setdefault("FAISS_INDEX_DIR", tempfile.mkdtemp(prefix="tests_faiss_index_"))
+os.environ.setdefault("INDEX_WATCH_INTERVAL_SECONDS", "0")
+os.environ.setdefault("ROLE_ACL_REFRESH_SECONDS", "0")
+# services.rag.agent builds its Gemini clients at import; tests swap in fakes
+os.environ.setdefault("GOOGLE_API_KEY", "tests-placeholder")
+os.environ.setdefault("ANSWER_CACHE_ENABLED", "false")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp(prefix='tests_db_')}/app.db")
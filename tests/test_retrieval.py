@@ -0,0 +1,52 @@
+import asyncio
+
+import numpy as np
+from langchain_core.documents import Document
+
+from services.rag.retrieval import Retriever
+
+QUERY = [1.0, 0.0, 0.0]
+
+
+def doc(name, vector):
+    return Document(page_content=name, metadata={"source": name, "category": "hr"}, id=name), np.array(vector, dtype=np.float32)
+
+
+# Near-duplicate chunks close to the query, one diverse chunk, and a chunk
+# that only mentions the employee ID (orthogonal to the query embedding)
+TOP = doc("top", [1.0, 0.0, 0.0])
+DUPLICATES = [doc(f"dup-{i}", [0.99, 0.01 * (i + 1), 0.0]) for i in range(4)]
+DIVERSE = doc("diverse", [0.7, 0.7, 0.0])
+EXACT_ID = doc("FINEMP1042 attendance", [0.0, 0.0, 1.0])
+
+
+class FakeEmbeddings:
+    async def aembed_query(self, query):
+        return QUERY
+
+
+class FakeIndex:
+    def __init__(self, vector_hits, lexical_hits):
+        self.vector_hits = vector_hits
+        self.lexical_hits = lexical_hits
+        self.vectors = {d.id: v for d, v in vector_hits + lexical_hits}
+
+    def search_by_vector(self, embedding, categories, k):
+        return [(d, float(i)) for i, (d, _) in enumerate(self.vector_hits[:k])]
+
+    def lexical_search(self, query, categories, k):
+        return [(d, 10.0 - i) for i, (d, _) in enumerate(self.lexical_hits[:k])]
+
+    def vectors_for(self, docs):
+        return np.vstack([self.vectors[d.id] for d in docs])
+
+
+def test_exact_id_hit_survives_hybrid_mmr():
+    index = FakeIndex([TOP, *DUPLICATES, DIVERSE], [EXACT_ID])
+    retriever = Retriever(index, FakeEmbeddings(), mode="hybrid", candidate_multiplier=3)
+
+    results, query_embedding = asyncio.run(retriever.retrieve("FINEMP1042 attendance", ["hr"], 6))
+    kept = retriever.diversify(results, query_embedding, 2, 0.6)
+
+    assert [d.id for d, _ in kept] == ["top", "FINEMP1042 attendance"]
+
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from db import crud
+from db.database import Base
+from services.rag.retrieval import Retriever
+from services.rag.role_acl import role_acl
+
+
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'roles.db'}")
+    Base.metadata.create_all(bind=engine)
+    saved = role_acl.snapshot()
+    with sessionmaker(bind=engine)() as session:
+        yield session
+    role_acl.replace(saved)
+    engine.dispose()
+
+
+class RecordingIndex:
+    def __init__(self):
+        self.categories = None
+
+    def lexical_search(self, query, categories, k):
+        self.categories = categories
+        return []
+
+
+def searched_categories(role):
+    index = RecordingIndex()
+    asyncio.run(Retriever(index, None, mode="lexical", mmr_enabled=False).search("budget", role))
+    return index.categories
+
+
+def test_categories_granted_at_creation_reach_retrieval(db):
+    crud.create_role(db, "Auditors", "Reads finance", ["Finance"])
+
+    assert searched_categories("auditors") == ["auditors", "finance"]
+
+
+def test_granted_categories_reach_retrieval(db):
+    role = crud.create_role(db, "auditors", "Reads finance")
+    assert searched_categories("auditors") == ["auditors"]
+
+    assert crud.grant_role_categories(db, role, ["finance", "hr", "finance"]) == ["auditors", "finance", "hr"]
+    assert searched_categories("auditors") == ["auditors", "finance", "hr"]
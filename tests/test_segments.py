@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from services.rag.ann import AnnConfig
+from services.rag.segments import append_segment, load_segmented_store
+
+DIMENSIONS = 16
+
+
+class NoEmbeddings(Embeddings):
+    def embed_documents(self, texts):
+        raise NotImplementedError
+
+    def embed_query(self, text):
+        raise NotImplementedError
+
+
+@pytest.mark.parametrize("index_type", ["flat", "ivf_flat", "ivf_pq", "hnsw"])
+def test_segments_load_memory_mapped(tmp_path, capsys, index_type):
+    ann = AnnConfig(index_type=index_type, nlist=4, pq_m=4, pq_nbits=4, min_chunks=0)
+    vectors = np.random.default_rng(0).random((400, DIMENSIONS), dtype=np.float32)
+    append_segment(
+        tmp_path / "hr",
+        [(f"chunk {i}", vector.tolist()) for i, vector in enumerate(vectors)],
+        [{"source": f"doc-{i // 10}.md", "category": "hr"} for i in range(len(vectors))],
+        [f"hr:{i}" for i in range(len(vectors))],
+        NoEmbeddings(),
+        build_store=ann.build_store
+    )
+
+    store = load_segmented_store(tmp_path / "hr", NoEmbeddings(), mmap=True, ann=ann)
+
+    assert "Could not memory-map" not in capsys.readouterr().out
+    assert len(store.similarity_search_with_score_by_vector(vectors[7].tolist(), k=3)) == 3
@@ -0,0 +1,65 @@
+import asyncio
+import uuid
+
+import pytest
+from langchain.agents import create_agent
+from langchain_core.documents import Document
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from services.rag import agent as agent_module
+
+
+class NonStreamingChatModel(BaseChatModel):
+    """Calls rag_tool, then answers in one message; implements no _stream"""
+
+    @property
+    def _llm_type(self):
+        return "non-streaming-fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        last = messages[-1]
+        if isinstance(last, HumanMessage):
+            reply = AIMessage(content="", tool_calls=[{
+                "name": "rag_tool",
+                "args": {"query": last.content},
+                "id": f"call_{uuid.uuid4().hex}",
+                "type": "tool_call",
+            }])
+        else:
+            reply = AIMessage(content="Annual leave is 24 days.")
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+@pytest.fixture
+def non_streaming_agent(monkeypatch):
+    async def search(query, user_role):
+        return [(Document(page_content="Employees get 24 days of annual leave.", metadata={"source": "leave.md"}), 1.0)]
+
+    monkeypatch.setattr(agent_module.retriever, "search", search)
+    monkeypatch.setattr(agent_module, "agent", create_agent(
+        NonStreamingChatModel(),
+        tools=[agent_module.rag_tool],
+        middleware=[agent_module.role_system_prompt],
+        context_schema=agent_module.ChatContext
+    ))
+
+
+def test_stream_query_answers_with_non_streaming_model(non_streaming_agent):
+    async def collect():
+        return [pair async for pair in agent_module.stream_query("How many leave days?", "employee")]
+
+    events = asyncio.run(collect())
+    names = [event for event, _ in events]
+    done = events[-1][1]
+
+    assert names[0] == "tool_start"
+    assert "sources" in names
+    assert "".join(data["text"] for event, data in events if event == "token") == "Annual leave is 24 days."
+    assert names[-1] == "done"
+    assert done["answer"] == "Annual leave is 24 days."
+    assert done["sources"] == [{"source": "leave.md"}]